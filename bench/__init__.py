@@ -0,0 +1,5 @@
+"""Benchmarks and load tools, run from the repository root with ``python -m bench.<name>``
+
+Nothing here connects to Discord. Gateway objects are faked and every run works
+against its own temporary SQLite database.
+"""
@@ -0,0 +1,30 @@
+# Builtin modules
+from pathlib import Path
+
+# Local modules
+from launcher import version
+from lib.bot import client, setup, connect_db
+from .fakes import FakeUser
+
+
+async def start(directory):
+    """The real client with every cog loaded, migrated onto a database in directory
+
+    Nothing connects to the gateway. The scheduler is left stopped, so write-behind
+    flushes only happen when the queue fills up or is flushed explicitly.
+    """
+
+    client.version = version
+    await connect_db(str(Path(directory) / 'database.db'))
+    if not client.cogs:
+        setup()
+
+    # client.user is read from the connection state that READY would have filled
+    client._connection.user = FakeUser(name='GuhBot', bot=True, discriminator='8433')
+    client.ready = True
+    return client
+
+async def stop():
+    await client.writes.close()
+    await client.db.close()
+    client.render.shutdown()
@@ -0,0 +1,114 @@
+# 3rd party modules
+import discord
+
+# Builtin modules
+from datetime import datetime
+from itertools import count
+
+_ids = count(10**17)
+
+
+def snowflake():
+    """Unique Discord-sized id"""
+
+    return next(_ids)
+
+
+class FakeUser(object):
+    """Just enough of discord.User/Member for the bot's hot paths"""
+
+    def __init__(self, id=None, name='user', bot=False, discriminator='0001', guild=None):
+        self.id = id or snowflake()
+        self.name = name
+        self.bot = bot
+        self.discriminator = discriminator
+        self.guild = guild
+        self.avatar = None
+        self.avatar_url = f"https://cdn.discordapp.com/embed/avatars/{self.id % 5}.png"
+        self.colour = self.color = 0
+
+    @property
+    def mention(self):
+        return f"<@!{self.id}>"
+
+    @property
+    def display_name(self):
+        return self.name
+
+    def __str__(self):
+        return f"{self.name}#{self.discriminator}"
+
+
+class FakeGuild(object):
+    def __init__(self, id=None, name='guild', members=()):
+        self.id = id or snowflake()
+        self.name = name
+        self.members = list(members)
+        self.me = FakeUser(name='GuhBot', bot=True, guild=self)
+
+    def get_member(self, user_id):
+        for member in self.members:
+            if member.id == user_id:
+                return member
+        return None
+
+
+class FakeChannel(object):
+    """Channel that swallows everything sent to it, counting the sends"""
+
+    def __init__(self, id=None, guild=None):
+        self.id = id or snowflake()
+        self.guild = guild
+        self.sent = 0
+        self.last = None  # Text content of the last send
+
+    async def send(self, content=None, **kwargs):
+        self.sent += 1
+        self.last = content
+        return FakeMessage(content or '', author=None, channel=self, guild=self.guild)
+
+    def permissions_for(self, member):
+        return discord.Permissions.all()
+
+    async def trigger_typing(self):
+        pass
+
+
+class FakeMessage(object):
+    def __init__(self, content, author, channel, guild=None, mentions=(), created_at=None):
+        self.id = snowflake()
+        self.content = content
+        self.author = author
+        self.channel = channel
+        self.guild = guild
+        self.mentions = list(mentions)
+        self.created_at = created_at or datetime.utcnow()
+        self.edited_at = None
+        self._state = None  # Read by Context.__init__, nothing here talks to a connection
+
+    async def add_reaction(self, emoji):
+        pass
+
+    async def delete(self):
+        pass
+
+    async def edit(self, **kwargs):
+        pass
+
+
+class FakeContext(object):
+    """Command context for calling command callbacks directly"""
+
+    def __init__(self, bot, message, command=None):
+        self.bot = bot
+        self.message = message
+        self.author = message.author
+        self.guild = message.guild
+        self.channel = message.channel
+        self.command = command
+
+    async def send(self, content=None, **kwargs):
+        return await self.channel.send(content, **kwargs)
+
+    async def trigger_typing(self):
+        pass
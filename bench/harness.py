@@ -0,0 +1,78 @@
+# Builtin modules
+import json
+import platform
+from time import perf_counter
+from pathlib import Path
+from datetime import datetime
+
+RESULTS_PATH = Path(__file__).parent / 'results'
+
+
+def percentile(ordered, q):
+    """Nearest-rank percentile of an already sorted list"""
+
+    return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+def summarize(name, samples):
+    """ops/sec and latency percentiles (microseconds) for per-operation timings in seconds"""
+
+    ordered = sorted(samples)
+    total = sum(ordered)
+    return {'name': name,
+            'iterations': len(ordered),
+            'ops_per_sec': len(ordered) / total if total else 0.0,
+            'mean_us': total / len(ordered) * 1e6,
+            'p50_us': percentile(ordered, 0.50) * 1e6,
+            'p95_us': percentile(ordered, 0.95) * 1e6,
+            'p99_us': percentile(ordered, 0.99) * 1e6,
+            'max_us': ordered[-1] * 1e6}
+
+async def measure(name, operation, iterations=5000, warmup=200):
+    """Time ``await operation(i)`` once per iteration after a warmup"""
+
+    for i in range(warmup):
+        await operation(i)
+
+    samples = []
+    for i in range(warmup, warmup + iterations):
+        start = perf_counter()
+        await operation(i)
+        samples.append(perf_counter() - start)
+
+    return summarize(name, samples)
+
+def report(results):
+    print(f"{'benchmark':<32} {'ops/sec':>12} {'p50 us':>10} {'p95 us':>10} {'p99 us':>10} {'max us':>10}")
+    for result in results:
+        print(f"{result['name']:<32} {result['ops_per_sec']:>12,.0f} {result['p50_us']:>10.1f} "
+              f"{result['p95_us']:>10.1f} {result['p99_us']:>10.1f} {result['max_us']:>10.1f}")
+
+def save(suite, results, version, path=None):
+    """Write results as JSON, by default to bench/results/<suite>-<version>-<time>.json"""
+
+    path = Path(path) if path else RESULTS_PATH / f"{suite}-{version}-{datetime.now():%Y%m%d-%H%M%S}.json"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump({'suite': suite,
+                   'version': version,
+                   'python': platform.python_version(),
+                   'machine': platform.machine(),
+                   'time': datetime.now().isoformat(timespec='seconds'),
+                   'results': results}, file, indent=2)
+    return path
+
+def compare(path, results):
+    """Print each benchmark's change against a saved run"""
+
+    with open(path, 'r', encoding='utf-8') as file:
+        old = json.load(file)
+    before = {result['name']: result for result in old['results']}
+
+    print(f"\nAgainst {old['version']} ({old['time']}):")
+    for result in results:
+        previous = before.get(result['name'])
+        if not previous:
+            continue
+        throughput = result['ops_per_sec'] / previous['ops_per_sec'] - 1 if previous['ops_per_sec'] else 0.0
+        tail = result['p99_us'] / previous['p99_us'] - 1 if previous['p99_us'] else 0.0
+        print(f"{result['name']:<32} ops/sec {throughput:>+8.1%}   p99 {tail:>+8.1%}")
@@ -0,0 +1,107 @@
+"""Micro-benchmarks for the code that runs on every gateway event
+
+    python -m bench.hotpaths [--iterations N] [--output FILE] [--compare FILE]
+"""
+
+# Builtin modules
+import argparse
+from tempfile import TemporaryDirectory
+
+# Local modules
+from . import bot, harness
+from lib.bot import client, get_prefix, on_message, load_prefixes, load_afk
+from .fakes import FakeUser, FakeGuild, FakeChannel, FakeMessage, FakeContext
+
+GUILDS = 1000  # Guilds with a custom prefix
+AFK_USERS = 200
+
+
+async def seed(guilds):
+    """Custom prefixes and AFK users, loaded through the same path as startup"""
+
+    await client.db.executemany('INSERT INTO prefixes (id, prefix) VALUES (?, ?)',
+                                [(guild.id, f"g{i % 10}!") for i, guild in enumerate(guilds)])
+    await client.db.executemany('INSERT INTO afk (id, mentions, reason) VALUES (?, 0, ?)',
+                                [(1000 + i, 'benchmarking') for i in range(AFK_USERS)])
+    await client.db.commit()
+    await load_prefixes()
+    await load_afk()
+
+async def run(iterations):
+    with TemporaryDirectory() as directory:
+        await bot.start(directory)
+
+        guilds = [FakeGuild(name=f"guild {i}") for i in range(GUILDS)]
+        await seed(guilds)
+
+        guild = guilds[0]
+        channel = FakeChannel(guild=guild)
+        author = FakeUser(name='author', guild=guild)
+        afk_user = FakeUser(id=1000, name='afk', guild=guild)
+
+        plain = FakeMessage('just chatting about nothing in particular', author, channel, guild)
+        mention = FakeMessage(f"hey {afk_user.mention}", author, channel, guild, mentions=[afk_user])
+        events = client.get_cog('Events')
+        meta = client.get_cog('Meta')
+
+        async def prefix(i):
+            await get_prefix(client, FakeMessage('', author, channel, guilds[i % GUILDS]))
+
+        async def message(i):
+            await on_message(plain)
+
+        async def afk_return(i):
+            # Every iteration is a different AFK user coming back
+            user_id = 1000 + i % AFK_USERS
+            client.afk[user_id] = {'mentions': 0, 'reason': 'benchmarking'}
+            await on_message(FakeMessage('back', FakeUser(id=user_id, guild=guild), channel, guild))
+
+        async def afk_mention(i):
+            client.afk[afk_user.id] = {'mentions': 0, 'reason': 'benchmarking'}
+            await on_message(mention)
+
+        async def bot_mention(i):
+            # A new author each time, the cooldown would otherwise answer instead
+            await on_message(FakeMessage(client.user.mention, FakeUser(guild=guild), channel, guild))
+
+        async def message_delete(i):
+            await events.on_message_delete(FakeMessage(f"deleted {i}", author, FakeChannel(id=i + 1, guild=guild), guild))
+
+        def help_page(*args):
+            async def page(i):
+                await meta.help.callback(meta, FakeContext(client, plain), *args)
+            return page
+
+        results = []
+        for name, operation in (('get_prefix', prefix),
+                                ('on_message.plain', message),
+                                ('on_message.afk_return', afk_return),
+                                ('on_message.afk_mention', afk_mention),
+                                ('on_message.bot_mention', bot_mention),
+                                ('Events.on_message_delete', message_delete),
+                                ('Meta.help', help_page()),
+                                ('Meta.help.module', help_page('fun')),
+                                ('Meta.help.command', help_page('meme')),
+                                ('Meta.help.unknown', help_page('memez'))):
+            results.append(await harness.measure(name, operation, iterations=iterations))
+            await client.writes.flush()  # Keep queued writes from leaking into the next benchmark
+
+        await bot.stop()
+        return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=5000)
+    parser.add_argument('--output', help='JSON file to write, defaults to bench/results/')
+    parser.add_argument('--compare', help='Earlier JSON results to compare against')
+    args = parser.parse_args()
+
+    results = client.loop.run_until_complete(run(args.iterations))
+
+    harness.report(results)
+    print(f"\nSaved {harness.save('hotpaths', results, client.version, args.output)}")
+    if args.compare:
+        harness.compare(args.compare, results)
+
+if __name__ == '__main__':
+    main()
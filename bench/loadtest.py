@@ -0,0 +1,144 @@
+"""Offline load test of the API backed commands in Fun, Roleplay and Misc
+
+    python -m bench.loadtest [--invocations 5000] [--concurrency 500] [--latency 50]
+                             [--error-rate 0.01] [--rate-limit 20] [--output FILE]
+
+Commands run through the real cogs, response cache and prefetch pools, against the
+mock API in bench.mockapi instead of the internet.
+"""
+
+# 3rd party modules
+from aiohttp import TraceConfig
+
+# Builtin modules
+import random
+import argparse
+from time import perf_counter
+from asyncio import Semaphore, gather
+from tempfile import TemporaryDirectory
+
+# Local modules
+from . import bot, harness
+from .fakes import FakeUser, FakeGuild, FakeChannel, FakeMessage, FakeContext
+from .mockapi import MockAPI, Redirect
+from lib.bot import client, create_session, HTTP_LIMIT, HTTP_LIMIT_PER_HOST, HTTP_TIMEOUT, HTTP_CONNECT_TIMEOUT
+
+# (cog, command, keyword arguments), picked at random for every invocation
+MIX = (('Fun', 'animal', {'animal': 'dog'}),
+       ('Fun', 'animal', {'animal': 'cat'}),
+       ('Fun', 'pikachu', {}),
+       ('Fun', 'meme', {}),
+       ('Fun', 'kanye', {}),
+       ('Fun', 'chatbot', {'message': 'hello there'}),
+       ('Roleplay', 'wink', {}),
+       ('Roleplay', 'pat', {}),
+       ('Roleplay', 'hug', {}),
+       ('Roleplay', 'facepalm', {}),
+       ('Misc', 'covid', {'country': 'usa'}))
+
+
+def connection_tracing(counts):
+    """TraceConfig counting new, reused and queued pool connections"""
+
+    trace = TraceConfig()
+
+    async def created(session, context, params):
+        counts['created'] += 1
+
+    async def reused(session, context, params):
+        counts['reused'] += 1
+
+    async def queued(session, context, params):
+        counts['queued'] += 1
+
+    trace.on_connection_create_end.append(created)
+    trace.on_connection_reuseconn.append(reused)
+    trace.on_connection_queued_start.append(queued)
+    return trace
+
+async def run(args):
+    api = MockAPI(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate, rate_limit=args.rate_limit)
+    connections = {'created': 0, 'reused': 0, 'queued': 0}
+
+    with TemporaryDirectory() as directory:
+        await bot.start(directory)
+        session = create_session(limit=HTTP_LIMIT,
+                                 limit_per_host=HTTP_LIMIT_PER_HOST,
+                                 timeout=HTTP_TIMEOUT,
+                                 connect_timeout=HTTP_CONNECT_TIMEOUT,
+                                 trace_configs=[connection_tracing(connections)])
+        client.session = Redirect(session, await api.start())
+
+        guild = FakeGuild()
+        limit = Semaphore(args.concurrency)
+        timings = {}  # command: [seconds]
+        failures = {}  # command: {'exceptions', 'degraded'}
+
+        async def invoke(i):
+            cog_name, name, kwargs = random.choice(MIX)
+            cog, command = client.get_cog(cog_name), client.get_command(name)
+            channel = FakeChannel(guild=guild)
+            ctx = FakeContext(client, FakeMessage(f"guh {name}", FakeUser(guild=guild), channel, guild), command)
+            failed = failures.setdefault(name, {'exceptions': 0, 'degraded': 0})
+
+            async with limit:
+                start = perf_counter()
+                try:
+                    await command.callback(cog, ctx, **kwargs)
+                except Exception:
+                    failed['exceptions'] += 1
+                timings.setdefault(name, []).append(perf_counter() - start)
+
+            if channel.last and channel.last.startswith('API returned'):
+                failed['degraded'] += 1
+
+        start = perf_counter()
+        await gather(*(invoke(i) for i in range(args.invocations)))
+        elapsed = perf_counter() - start
+
+        # Let refills started by the last commands finish, closing the session under them counts as errors
+        await gather(*(pool._task for pool in client.prefetch.pools.values() if pool._task))
+        usage = {'server': dict(api.stats),
+                 'connections': connections,
+                 'api_cache': dict(client.api_cache.stats),
+                 'prefetch': client.prefetch.stats}
+
+        await client.session.close()
+        await api.stop()
+        await bot.stop()
+
+    results = [dict(harness.summarize('all', [t for samples in timings.values() for t in samples]),
+                    wall_seconds=elapsed,
+                    throughput=args.invocations / elapsed)]
+    for name, samples in sorted(timings.items()):
+        results.append(dict(harness.summarize(name, samples), **failures[name]))
+
+    return results, usage
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--invocations', type=int, default=5000)
+    parser.add_argument('--concurrency', type=int, default=500, help='Invocations in flight at once')
+    parser.add_argument('--latency', type=float, default=50, help='Mean API response time in ms')
+    parser.add_argument('--jitter', type=float, default=20)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--rate-limit', type=int, default=None, help='API requests per second per host')
+    parser.add_argument('--output', help='JSON file to write, defaults to bench/results/')
+    args = parser.parse_args()
+
+    results, usage = client.loop.run_until_complete(run(args))
+
+    overall = results[0]
+    print(f"{args.invocations:,d} invocations in {overall['wall_seconds']:.2f}s, {overall['throughput']:,.0f}/s\n")
+    harness.report(results)
+    print(f"\n{'command':<32} {'exceptions':>10} {'degraded':>10}")
+    for result in results[1:]:
+        print(f"{result['name']:<32} {result['exceptions']:>10,d} {result['degraded']:>10,d}")
+    for name, stats in usage.items():
+        print(f"\n{name}: " + ', '.join(f"{key} {value:,}" for key, value in stats.items()))
+
+    results.append({'name': 'usage', **usage})
+    print(f"\nSaved {harness.save('loadtest', results, client.version, args.output)}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,133 @@
+"""Local stand-in for the third party APIs the cogs call, serving recorded fixtures
+
+    python -m bench.mockapi [--port 8080] [--latency 50] [--error-rate 0.01] [--rate-limit 20]
+
+Requests for https://<host>/<path> are expected at http://127.0.0.1:<port>/<host>/<path>.
+"""
+
+# 3rd party modules
+from aiohttp import web
+
+# Builtin modules
+import json
+import random
+import argparse
+from time import monotonic
+from asyncio import sleep, get_event_loop
+from pathlib import Path
+from urllib.parse import urlsplit
+
+FIXTURES_PATH = Path(__file__).parent / 'fixtures' / 'api.json'
+
+
+class MockAPI(object):
+    """Fixture server with configurable latency, error rate and per-host rate limits"""
+
+    def __init__(self, fixtures=FIXTURES_PATH, latency=50, jitter=20, error_rate=0.0, rate_limit=None):
+        with open(fixtures, 'r', encoding='utf-8') as file:
+            # Longest prefix first, so the most specific fixture wins
+            self.fixtures = sorted(json.load(file).items(), key=lambda item: len(item[0]), reverse=True)
+
+        self.latency = latency / 1000
+        self.jitter = jitter / 1000
+        self.error_rate = error_rate
+        self.rate_limit = rate_limit  # Requests per second per host, None for no limit
+
+        self.stats = {'requests': 0, 'ok': 0, 'errors': 0, 'rate_limited': 0, 'not_found': 0}
+        self._windows = {}  # host: (second, requests in it)
+        self._runner = None
+        self.url = None
+
+    def fixture(self, path):
+        for prefix, body in self.fixtures:
+            if path.startswith(prefix):
+                return body
+        return None
+
+    def limited(self, host):
+        if not self.rate_limit:
+            return False
+
+        second = int(monotonic())
+        window, requests = self._windows.get(host, (second, 0))
+        if window != second:
+            window, requests = second, 0
+        self._windows[host] = (window, requests + 1)
+        return requests >= self.rate_limit
+
+    async def handle(self, request):
+        self.stats['requests'] += 1
+        path = request.match_info['path']
+        host = path.split('/', 1)[0]
+
+        await sleep(max(random.gauss(self.latency, self.jitter), 0))
+
+        if self.limited(host):
+            self.stats['rate_limited'] += 1
+            return web.json_response({'error': 'rate limited'}, status=429, headers={'Retry-After': '1'})
+
+        if random.random() < self.error_rate:
+            self.stats['errors'] += 1
+            return web.json_response({'error': 'internal server error'}, status=500)
+
+        body = self.fixture(path)
+        if body is None:
+            self.stats['not_found'] += 1
+            return web.json_response({'error': 'no fixture'}, status=404)
+
+        self.stats['ok'] += 1
+        return web.json_response(body)
+
+    async def start(self, host='127.0.0.1', port=0):
+        app = web.Application()
+        app.router.add_get('/{path:.*}', self.handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, host, port).start()
+
+        host, port = self._runner.addresses[0][:2]
+        self.url = f"http://{host}:{port}"
+        return self.url
+
+    async def stop(self):
+        if self._runner:
+            await self._runner.cleanup()
+
+
+class Redirect(object):
+    """Session stand-in that sends https://<host>/<path> requests to the mock API"""
+
+    def __init__(self, session, url):
+        self.session = session
+        self.url = url
+
+    def get(self, url, **kwargs):
+        parts = urlsplit(url)
+        query = f"?{parts.query}" if parts.query else ''
+        return self.session.get(f"{self.url}/{parts.netloc}{parts.path}{query}", **kwargs)
+
+    async def close(self):
+        await self.session.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--latency', type=float, default=50, help='Mean response time in ms')
+    parser.add_argument('--jitter', type=float, default=20, help='Standard deviation of the response time in ms')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of requests answered with a 500')
+    parser.add_argument('--rate-limit', type=int, default=None, help='Requests per second per host before 429s')
+    args = parser.parse_args()
+
+    api = MockAPI(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate, rate_limit=args.rate_limit)
+    loop = get_event_loop()
+    print(f"Serving fixtures on {loop.run_until_complete(api.start(port=args.port))}")
+    try:
+        loop.run_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        loop.run_until_complete(api.stop())
+
+if __name__ == '__main__':
+    main()
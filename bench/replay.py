@@ -0,0 +1,227 @@
+"""Replay a gateway recording from the record command through the real bot
+
+    python -m bench.replay data/recordings/<file>.jsonl.gz [--speed 1|10|max] [--output FILE]
+
+Events go through client.dispatch against a temporary database, API calls go to the
+mock API in bench.mockapi. Reports the handling cost of each event type, and of each
+command for messages that invoked one. Events whose handler raised are left out of the
+timings and reported separately.
+"""
+
+# 3rd party modules
+from discord.ext.commands import CommandOnCooldown, CooldownMapping
+
+# Builtin modules
+import sys
+import gzip
+import json
+import argparse
+import traceback
+from time import perf_counter, process_time
+from asyncio import all_tasks, wait, sleep, gather
+from tempfile import TemporaryDirectory
+from contextvars import ContextVar
+
+# Local modules
+from . import bot, harness
+from .fakes import FakeUser, FakeGuild, FakeChannel, FakeMessage
+from .mockapi import MockAPI, Redirect
+from lib.bot import client, create_session, DEFAULT_PREFIX
+from lib.bot.instruments import InstrumentedContext
+
+# Handler errors raised for the event being timed, handler tasks inherit it from dispatch
+_failures = ContextVar('replay_failures', default=None)
+
+
+class ReplayContext(InstrumentedContext):
+    """Context that talks to the fake channel instead of the Discord API"""
+
+    async def send(self, content=None, **kwargs):
+        with self.bot.instruments.timed('send'):
+            return await self.channel.send(content, **kwargs)
+
+    async def trigger_typing(self):
+        pass
+
+
+class World(object):
+    """Fake guilds, channels and users, created as the recording mentions them"""
+
+    def __init__(self):
+        self.guilds = {}
+        self.channels = {}
+        self.users = {}
+
+    def guild(self, id):
+        if id is None:
+            return None
+        if id not in self.guilds:
+            self.guilds[id] = FakeGuild(id=id)
+        return self.guilds[id]
+
+    def channel(self, id, guild):
+        if id not in self.channels:
+            self.channels[id] = FakeChannel(id=id, guild=guild)
+        return self.channels[id]
+
+    def user(self, id, guild, bot=False):
+        if id not in self.users:
+            self.users[id] = FakeUser(id=id, bot=bool(bot), guild=guild)
+        return self.users[id]
+
+    def message(self, fields):
+        guild = self.guild(fields['g'])
+        author = self.user(fields['a'], guild, fields.get('b'))
+        mentions = [self.user(id, guild) for id in fields.get('m', ())]
+
+        if fields.get('bm'):
+            content = client.user.mention
+        elif fields.get('cmd'):
+            content = f"{DEFAULT_PREFIX}{fields['cmd']}"  # Arguments are never recorded
+        else:
+            content = 'x' * fields['n']
+
+        return FakeMessage(content, author, self.channel(fields['c'], guild), guild, mentions=mentions)
+
+    def event(self, event, fields):
+        """(event type reported on, dispatch arguments)"""
+
+        if event == 'message':
+            kind = 'message:bot_mention' if fields.get('bm') else f"message:{fields['cmd']}" if fields.get('cmd') else 'message'
+            return kind, (self.message(fields),)
+
+        if event == 'message_delete':
+            guild = self.guild(fields['g'])
+            author = self.user(fields['a'], guild)
+            return event, (FakeMessage('x' * fields['n'], author, self.channel(fields['c'], guild), guild),)
+
+        guild = self.guild(fields['g'])
+        member = self.user(fields['u'], guild, fields.get('b'))
+        if event == 'member_join':
+            guild.members.append(member)
+        elif event == 'member_remove' and member in guild.members:
+            guild.members.remove(member)
+        return event, ((member, member) if event == 'member_update' else (member,))
+
+
+def load(path):
+    with gzip.open(path, 'rt', encoding='utf-8') as stream:
+        return [json.loads(line) for line in stream if line.strip()]
+
+async def handle(event, args):
+    """Dispatch one event and wait for every handler it started"""
+
+    before = all_tasks()
+    client.dispatch(event, *args)
+    handlers = all_tasks() - before
+    if handlers:
+        await wait(handlers)
+
+async def run(args):
+    events = load(args.recording)
+    api = MockAPI(latency=args.latency, jitter=args.latency / 4)
+    world = World()
+    wall, cpu = {}, {}  # event type: [seconds]
+    failed = {}  # event type: events whose handler raised
+    tracebacks = {}  # event: first traceback
+
+    async def on_error(event, *_, **__):
+        if isinstance(sys.exc_info()[1], CommandOnCooldown):
+            return  # Answered by the Errors cog, which re-raises it
+        tracebacks.setdefault(event, traceback.format_exc())
+        failures = _failures.get()
+        if failures is not None:
+            failures.append(event)
+
+    with TemporaryDirectory() as directory:
+        await bot.start(directory)
+        client.context_class = ReplayContext
+        client.on_error = on_error
+        if args.speed != '1':
+            # Recorded gaps are compressed, so repeat commands would trip cooldowns the users never hit
+            for command in client.walk_commands():
+                command._buckets = CooldownMapping(None)
+        client.session = Redirect(create_session(), await api.start())
+
+        async def timed(kind, dispatched):
+            failures = []
+            _failures.set(failures)
+            start, start_cpu = perf_counter(), process_time()
+            await handle(*dispatched)
+            if failures:
+                failed[kind] = failed.get(kind, 0) + 1
+                return
+            wall.setdefault(kind, []).append(perf_counter() - start)
+            if args.speed == 'max':
+                # Sequential, so the CPU time belongs to this event (and any background work it overlapped)
+                cpu.setdefault(kind, []).append(process_time() - start_cpu)
+
+        start, start_cpu = perf_counter(), process_time()
+        if args.speed == 'max':
+            for _, event, fields in events:
+                kind, dispatch_args = world.event(event, fields)
+                await timed(kind, (event, dispatch_args))
+        else:
+            speed = float(args.speed)
+            pending = []
+            for offset, event, fields in events:
+                delay = offset / speed - (perf_counter() - start)
+                if delay > 0:
+                    await sleep(delay)
+                kind, dispatch_args = world.event(event, fields)
+                pending.append(client.loop.create_task(timed(kind, (event, dispatch_args))))
+            await gather(*pending)
+
+        elapsed, used = perf_counter() - start, process_time() - start_cpu
+        await client.session.close()
+        await api.stop()
+        await bot.stop()
+
+    results = []
+    for kind, samples in sorted(wall.items()):
+        result = harness.summarize(kind, samples)
+        if kind in cpu:
+            result['cpu_us'] = sum(cpu[kind]) / len(cpu[kind]) * 1e6
+        results.append(result)
+
+    summary = {'name': 'replay',
+               'recording': str(args.recording),
+               'speed': args.speed,
+               'events': len(events),
+               'wall_seconds': elapsed,
+               'cpu_seconds': used,
+               'cpu_percent': used / elapsed * 100 if elapsed else 0.0,
+               'failed': failed,
+               'tracebacks': tracebacks}
+    return results, summary
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('recording')
+    parser.add_argument('--speed', default='max', choices=('1', '10', 'max'))
+    parser.add_argument('--latency', type=float, default=50, help='Mean mock API response time in ms')
+    parser.add_argument('--output', help='JSON file to write, defaults to bench/results/')
+    args = parser.parse_args()
+
+    results, summary = client.loop.run_until_complete(run(args))
+
+    speed = 'max speed' if args.speed == 'max' else f"{args.speed}x"
+    print(f"{summary['events']:,d} events at {speed} in {summary['wall_seconds']:.2f}s, "
+          f"{summary['cpu_seconds']:.2f}s CPU ({summary['cpu_percent']:.0f}%)\n")
+    harness.report(results)
+    if args.speed == 'max':
+        print(f"\n{'event':<32} {'cpu us/event':>12}")
+        for result in results:
+            print(f"{result['name']:<32} {result['cpu_us']:>12.1f}")
+    if summary['failed']:
+        print(f"\nFAILED: {sum(summary['failed'].values()):,d} event(s) raised and are not in the timings: "
+              + ', '.join(f"{kind} {count:,d}" for kind, count in sorted(summary['failed'].items())))
+        for event, trace in summary['tracebacks'].items():
+            print(f"\nFirst error in {event}:\n{trace}")
+
+    print(f"\nSaved {harness.save('replay', results + [summary], client.version, args.output)}")
+    if summary['failed']:
+        raise SystemExit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,3 @@
+-- transaction: off
+-- journal_mode is persistent and cannot be changed inside a transaction
+PRAGMA journal_mode = WAL;
@@ -1,7 +1,8 @@
-from lib.bot import launch
-
 version = '1.1.0'  # discord.py 1.5.1
 # v[Release].[Major].[Minor].[Patch]
 
 if __name__ == '__main__':
-    launch(version)
\ No newline at end of file
+    # Importing lib.bot starts the bot, so render worker processes must not import it
+    from lib.bot import launch
+
+    launch(version)
@@ -2,7 +2,7 @@
 from discord import Embed, Intents
 from aiosqlite import connect
 from discord.ext.commands import Bot
-from asyncio import sleep, get_event_loop
+from asyncio import sleep
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from discord.ext.commands import when_mentioned_or, CooldownMapping, BucketType
 
@@ -13,6 +13,22 @@ from os import getcwd, sep
 from json import load, dump
 from logging import basicConfig, INFO
 
+# Local modules
+from .db import WriteQueue, migrate
+from .http import ResponseCache, create_session
+from .prefetch import Prefetcher
+from .avatars import AvatarCache
+from .renders import RenderCache
+from .help import HelpIndex
+from .users import UserTally
+from .metrics import MetricsSampler
+from .instruments import Instruments, InstrumentedContext
+from .profiling import Profiler
+from .watchdog import LoopWatchdog
+from .recorder import Recorder
+from lib.imaging.pool import RenderPool
+from lib.imaging.encoding import Encoding
+
 # Logging
 cwd = Path(__file__).parents[0]
 cwd = str(cwd)
@@ -24,27 +40,82 @@ COGS = [path.split(sep)[-1][:-3] for path in glob('./lib/cogs/*.py')]
 
 # DB files
 DB_PATH = "./data/db/database.db"
-BUILD_PATH = "./data/db/build.sql"
+MIGRATIONS_PATH = "./data/db/migrations"
+# Connection scoped pragmas, persistent ones such as journal_mode belong in migrations
+PRAGMAS = ('synchronous = NORMAL', 'mmap_size = 67108864')
+WRITE_BATCH_SIZE = 100 # Pending writes before a flush is forced
+WRITE_INTERVAL = 5 # Seconds between scheduled flushes
+
+# Outbound HTTP
+HTTP_LIMIT = 100 # Pooled connections across all hosts
+HTTP_LIMIT_PER_HOST = 10
+HTTP_DNS_TTL = 300 # Seconds
+HTTP_TIMEOUT = 10 # Seconds per request, including reading the body
+HTTP_CONNECT_TIMEOUT = 5
+API_CACHE_SIZE = 256 # Cached responses kept before the least recently used is evicted
+# url prefix: (seconds fresh, seconds a stale copy is served while it refreshes)
+# Endpoints that return random content are left out so every call stays random
+# Misc's scheduled COVID refresh always fetches, the cached summary serves anything else in between
+API_CACHE_TTLS = {'https://api.covid19api.com/summary': (600, 3600)}
+PREFETCH_SIZE = 5 # Responses buffered per random-content endpoint
+PREFETCH_LOW_WATER = 2 # Refill once a buffer drops to this many
+PREFETCH_INTERVAL = 30 # Seconds between scheduled top-ups
+PREFETCH_PER_HOST = 2 # Prefetch requests in flight at once per API host, across all its endpoints
+PREFETCH_BACKOFF = 5 # Seconds an endpoint waits to refill after a failure, doubled per failure in a row
+PREFETCH_MAX_BACKOFF = 300
+
+# Image rendering
+RENDER_WORKERS = 2 # Worker processes (or threads) for the Images cog
+RENDER_PROCESSES = True # False renders on threads instead
+RENDER_QUEUE = 32 # Jobs allowed in flight before new ones are rejected
+RENDER_TIMEOUT = 15 # Seconds
+AVATAR_CACHE_BYTES = 32 * 1024**2 # Downloaded avatar bytes kept in memory
+AVATAR_DECODED = True # Let render workers keep decoded avatars as well
+RENDER_CACHE_BYTES = 16 * 1024**2 # Rendered images kept in memory
+RENDER_SPILL_PATH = "./data/cache/renders" # None keeps rendered images in memory only
+RENDER_SPILL_BYTES = 128 * 1024**2
+IMAGE_BYTE_BUDGET = 96 * 1024 # Uploads over this go lossy (still images) or to a smaller palette (GIFs)
+IMAGE_FORMATS = ('png', 'webp') # Still image formats the encoder may pick from
+
+# Metrics
+METRICS_INTERVAL = 5 # Seconds between samples
+METRICS_SAMPLES = 720 # Samples kept, an hour at the default interval
+INSTRUMENTS_PATH = "./data/metrics.prom" # Prometheus text file of per-command timings, None disables it
+INSTRUMENTS_INTERVAL = 60 # Seconds between writes of the text file
+INSTRUMENTS_PORT = None # Serve the same text on 127.0.0.1:<port>/metrics
+PROFILES_PATH = "./data/profiles" # Reports from the cprofile, profileloop and memsnapshot commands
+WATCHDOG_INTERVAL = 0.1 # Seconds between event loop heartbeats
+WATCHDOG_THRESHOLD = 0.25 # Seconds a callback may hold the loop before it counts as a stall
+RECORDINGS_PATH = "./data/recordings" # Gateway recordings from the record command, replayed by bench.replay
+
+DEFAULT_PREFIX = 'guh '
 
 async def get_prefix(client, message):
+    prefix = client.prefixes.get(message.guild.id, DEFAULT_PREFIX) if message.guild else DEFAULT_PREFIX
+    return when_mentioned_or(prefix)(client, message)
+
+async def guild_prefix(message):
+    if not message.guild:
+        return DEFAULT_PREFIX
+    return client.prefixes.get(message.guild.id, DEFAULT_PREFIX)
+
+async def load_prefixes():
+    """Warm the guild prefix cache with every custom prefix"""
+
     cur = await client.db.cursor()
-    await cur.execute('SELECT prefix FROM prefixes WHERE id = ?', (message.guild.id,))
-    prefix = await cur.fetchone()
+    await cur.execute('SELECT id, prefix FROM prefixes')
+    client.prefixes = {guild_id: prefix for guild_id, prefix in await cur.fetchall()}
     await cur.close()
-    if not prefix: 
-        return when_mentioned_or('guh ')(client, message)
-    else:
-        return when_mentioned_or(prefix[0])(client, message)
+    print(f"Cached {len(client.prefixes)} custom prefix(es)")
+
+async def load_afk():
+    """Warm the AFK registry with every user currently marked as AFK"""
 
-async def guild_prefix(message):
     cur = await client.db.cursor()
-    await cur.execute('SELECT prefix FROM prefixes WHERE id = ?', (message.guild.id,))
-    prefix = await cur.fetchone()
+    await cur.execute('SELECT id, mentions, reason FROM afk')
+    client.afk = {user_id: {'mentions': mentions, 'reason': reason} for user_id, mentions, reason in await cur.fetchall()}
     await cur.close()
-    if not prefix:
-        return 'guh '
-    else:
-        return prefix[0]
+    print(f"Cached {len(client.afk)} AFK user(s)")
 
 class Ready(object):
     """Cog console logging on startup"""
@@ -66,16 +137,59 @@ class Ready(object):
 
         return all([getattr(self, cog) for cog in COGS])
 
+class GuhBot(Bot):
+    """Bot that flushes pending database writes and releases its HTTP session and
+    render workers before closing"""
+
+    context_class = InstrumentedContext
+
+    async def get_context(self, message, *, cls=None):
+        return await super().get_context(message, cls=cls or self.context_class)
+
+    def dispatch(self, event_name, *args, **kwargs):
+        if self.recorder.recording:
+            self.recorder.record(event_name, args)
+        super().dispatch(event_name, *args, **kwargs)
+
+    async def close(self):
+        self.watchdog.stop()
+        if self.recorder.recording:
+            await self.recorder.stop()
+        await self.writes.close()
+        await self.db.close()  # Its worker thread would keep the process alive
+        await self.instruments.close()
+        await self.session.close()
+        self.render.shutdown()
+        await super().close()
+
 intents = Intents.default()
-client = Bot(command_prefix=get_prefix, intents=intents, case_insensitive=True, help_command=None)
+client = GuhBot(command_prefix=get_prefix, intents=intents, case_insensitive=True, help_command=None)
 
 client.prefix = guild_prefix
+client.prefixes = {}
+client.afk = {}
+client.default_prefix = DEFAULT_PREFIX
 client.ready = False
 client.cogs_ready = Ready()
 client.support_url = 'https://discord.gg/PBmfvpU'
 client.official_url = 'https://guhbean.github.io/guhbot'
 client.invite_url = 'https://discord.com/api/oauth2/authorize?client_id=624754986248831017&permissions=536210679&scope=bot'
 client.scheduler = AsyncIOScheduler()
+client.api_cache = ResponseCache(client, ttls=API_CACHE_TTLS, max_entries=API_CACHE_SIZE)
+client.prefetch = Prefetcher(client, size=PREFETCH_SIZE, low_water=PREFETCH_LOW_WATER, interval=PREFETCH_INTERVAL,
+                             per_host=PREFETCH_PER_HOST, backoff=PREFETCH_BACKOFF, max_backoff=PREFETCH_MAX_BACKOFF)
+client.render = RenderPool(workers=RENDER_WORKERS, max_queue=RENDER_QUEUE, timeout=RENDER_TIMEOUT, processes=RENDER_PROCESSES)
+client.avatars = AvatarCache(client, max_bytes=AVATAR_CACHE_BYTES, decoded=AVATAR_DECODED)
+client.renders = RenderCache(client, max_bytes=RENDER_CACHE_BYTES, spill_path=RENDER_SPILL_PATH, max_spill_bytes=RENDER_SPILL_BYTES)
+client.image_encoding = Encoding(budget=IMAGE_BYTE_BUDGET, formats=IMAGE_FORMATS)
+client.writes = WriteQueue(client, batch_size=WRITE_BATCH_SIZE, interval=WRITE_INTERVAL)
+client.help_index = HelpIndex(client)
+client.users_tally = UserTally()
+client.metrics = MetricsSampler(client, interval=METRICS_INTERVAL, size=METRICS_SAMPLES)
+client.instruments = Instruments(client, path=INSTRUMENTS_PATH, interval=INSTRUMENTS_INTERVAL, port=INSTRUMENTS_PORT)
+client.profiler = Profiler(client, path=PROFILES_PATH)
+client.watchdog = LoopWatchdog(client, interval=WATCHDOG_INTERVAL, threshold=WATCHDOG_THRESHOLD)
+client.recorder = Recorder(client, path=RECORDINGS_PATH)
 client.cooldown = CooldownMapping.from_cooldown(1, 5, BucketType.user)
 client.colours = {'WHITE': 0xFFFFFF,
                 'AQUA': 0x1ABC9C,
@@ -106,12 +220,16 @@ def setup():
         client.load_extension(f"lib.cogs.{cog}")
         print(f"Initial setup for {cog}.py")
 
+    client.help_index.build()
     print('Cog setup complete')
 
 def launch(version):
     """Run the bot using the API token"""
 
     client.version = version
+    client.loop.run_until_complete(connect_db())
+    client.loop.run_until_complete(connect_http())
+
     print('Running setup...')
     setup()
     with open('./lib/bot/token.0', 'r', encoding='utf-8') as tf:
@@ -121,20 +239,39 @@ def launch(version):
 
     client.run(client.TOKEN, reconnect=True)
 
-async def connect_db():
+async def connect_db(path=DB_PATH):
+    """Connect, migrate and warm the caches before the gateway is touched"""
+
+    client.db = await connect(path)
+    for pragma in PRAGMAS:
+        await client.db.execute(f"PRAGMA {pragma}")
 
-    client.db = await connect(DB_PATH)
+    await migrate(client.db, MIGRATIONS_PATH)
+    await load_prefixes()
+    await load_afk()
 
-get_event_loop().run_until_complete(connect_db())
+async def connect_http():
+    """Open the shared outbound HTTP session"""
+
+    client.session = create_session(limit=HTTP_LIMIT,
+                                    limit_per_host=HTTP_LIMIT_PER_HOST,
+                                    dns_ttl=HTTP_DNS_TTL,
+                                    timeout=HTTP_TIMEOUT,
+                                    connect_timeout=HTTP_CONNECT_TIMEOUT)
 
 @client.event
 async def on_ready():
 
-    cur = await client.db.cursor()
-    with open(BUILD_PATH, 'r', encoding='utf-8') as script:
-	    await cur.executescript(script.read())
+    client.users_tally.rebuild(client.guilds) # The member cache is refilled on every READY
+
+    if client.ready: # Reconnects fire READY again, everything is already set up
+        print('Reconnected to the gateway')
+        await client.get_cog('Meta').set(force=True) # A new session starts without a presence
+        return
 
     client.scheduler.start()
+    client.watchdog.start()
+    await client.instruments.serve()
 
     status_channel = client.get_channel(735332260559061042)
     await status_channel.send(':wave: Hello everyone! I\'m back online!')
@@ -143,7 +280,6 @@ async def on_ready():
         await sleep(0.5)
     print(f"Your bot is online and ready to go!")
     client.ready = True
-    client.scheduler.start()
 
     meta = client.get_cog('Meta')
     await meta.set()
@@ -152,45 +288,34 @@ async def on_ready():
 async def on_message(message):
 
     if not message.author.bot and message.guild:
-        cur0 = await client.db.cursor() 
-        await cur0.execute('SELECT * FROM afk WHERE id = ?', (message.author.id,)) # Select row with author id
-        author_afk = await cur0.fetchone()
-        
-        if author_afk: # Check if row exists
-            await cur0.execute('DELETE FROM afk WHERE id = ?', (message.author.id,)) # Delete row
+        author_afk = client.afk.pop(message.author.id, None)
+
+        if author_afk: # Only users in the AFK registry ever reach the database
+            client.writes.write('afk', message.author.id, 'DELETE FROM afk WHERE id = ?', (message.author.id,)) # Delete row
 
             embed = Embed(title='🟢 Cleared AFK Status',
-            description=f"You have **automatically** been marked as **no longer AFK**, you had **{author_afk[1]} mention(s)** while you were **AFK** for: **{author_afk[2]}**",
+            description=f"You have **automatically** been marked as **no longer AFK**, you had **{author_afk['mentions']} mention(s)** while you were **AFK** for: **{author_afk['reason']}**",
             colour=client.colours['GREEN'],
             timestamp=message.created_at)
             embed.set_author(name=f"{message.author.name}#{message.author.discriminator}",
                                 icon_url=message.author.avatar_url)
         
             await message.channel.send(embed=embed, delete_after=15)
-
-        await cur0.close()
-        await client.db.commit()
             
-        if message.mentions: # If the message has any mentions
+        if message.mentions and client.afk: # If the message has any mentions and anyone is AFK
             for user in message.mentions: # Get all users from mention list
-                if not user.bot: 
-                    cur1 = await client.db.cursor()
-                    await cur1.execute('SELECT * FROM afk WHERE id = ?', (user.id,)) # Select row with user id
-                    user_afk = await cur1.fetchone()
-                    if user_afk:
-                        new_counter = int(user_afk[1]) + 1
-                        await cur1.execute('UPDATE afk SET mentions = ? WHERE id = ?', (new_counter, user.id)) # Add to mention counter
-
-                        embed = Embed(name='🔴 AFK',
-                                        description=f"{user.mention} is currently set as **AFK** for: **{user_afk[2]}**",
-                                        colour=client.colours['RED'],
-                                        timestamp=message.created_at)
-                        embed.set_author(name=f"{user.name}#{user.discriminator}",
-                                            icon_url=user.avatar_url)
-                        await message.channel.send(embed=embed, delete_after=15) 
-
-                        await cur1.close()
-                        await client.db.commit()
+                user_afk = None if user.bot else client.afk.get(user.id)
+                if user_afk:
+                    user_afk['mentions'] += 1
+                    client.writes.increment('afk', user.id, 'UPDATE afk SET mentions = mentions + ? WHERE id = ?') # Add to mention counter
+
+                    embed = Embed(name='🔴 AFK',
+                                    description=f"{user.mention} is currently set as **AFK** for: **{user_afk['reason']}**",
+                                    colour=client.colours['RED'],
+                                    timestamp=message.created_at)
+                    embed.set_author(name=f"{user.name}#{user.discriminator}",
+                                        icon_url=user.avatar_url)
+                    await message.channel.send(embed=embed, delete_after=15) 
 
         if message.content.startswith(f"<@!{client.user.id}>") and \
             len(message.content) == len(f"<@!{client.user.id}>"
@@ -201,19 +326,44 @@ async def on_message(message):
             if retry_after:
                 await message.channel.send(f"Slow Down {message.author.mention}! Please wait {round(retry_after, 3)} seconds.")
             else:
-                await message.channel.send(f"Hey {message.author.mention}! My prefix here is `{await client.prefix(message)}`\nDo `{await client.prefix(message)}help` to get started.", delete_after=10)
+                prefix = await client.prefix(message)
+                await message.channel.send(f"Hey {message.author.mention}! My prefix here is `{prefix}`\nDo `{prefix}help` to get started.", delete_after=10)
 
         await client.process_commands(message)
 
+@client.before_invoke
+async def before_invoke(ctx):
+    await client.instruments.before(ctx)
+    client.watchdog.enter(ctx)
+    client.profiler.before(ctx)
+
+@client.after_invoke
+async def after_invoke(ctx):
+    client.profiler.after(ctx)
+    client.watchdog.exit(ctx)
+    await client.instruments.after(ctx)
+
 @client.event
-async def on_guild_remove(self, guild):
-    print(f"Removed from server {guild.name}: {guild.id}")
+async def on_command(ctx):
+    client.metrics.commands += 1
 
-    cur = await self.db.cursor()
-    await cur.execute('SELECT prefix FROM prefixes WHERE id = ?', (guild.id,))
-    prefix = await cur.fetchone()
+@client.event
+async def on_member_join(member):
+    client.users_tally.add(member.id)
+
+@client.event
+async def on_member_remove(member):
+    client.users_tally.remove(member.id)
+
+@client.event
+async def on_guild_join(guild):
+    client.users_tally.add_guild(guild)
+
+@client.event
+async def on_guild_remove(guild):
+    print(f"Removed from server {guild.name}: {guild.id}")
 
-    if prefix:
-        await cur.execute('DELETE FROM prefixes WHERE id = ?', (guild.id,))
+    client.users_tally.remove_guild(guild)
 
-    await self.db.commit()
+    if client.prefixes.pop(guild.id, None) is not None:
+        client.writes.write('prefixes', guild.id, 'DELETE FROM prefixes WHERE id = ?', (guild.id,))
@@ -0,0 +1,83 @@
+# Builtin modules
+from asyncio import shield
+from collections import OrderedDict
+
+# Local modules
+from lib.imaging.ops import Avatar
+
+
+class AvatarCache(object):
+    """LRU cache of avatar bytes keyed by (user id, avatar hash, format, size)
+
+    Bounded by total bytes. A user's entries are dropped as soon as their avatar hash
+    changes. With ``decoded`` the key travels with the bytes so render workers can
+    also keep the decoded image.
+    """
+
+    def __init__(self, client, max_bytes=32 * 1024**2, decoded=True):
+        self.client = client
+        self.max_bytes = max_bytes
+        self.decoded = decoded
+        self.bytes = 0
+
+        self._entries = OrderedDict()  # key: bytes
+        self._hashes = {}  # user id: avatar hash of the cached entries
+        self._inflight = {}  # key: Task
+
+        self.stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'invalidations': 0}
+
+    def __len__(self):
+        return len(self._entries)
+
+    async def read(self, user, format=None, static_format='png', size=128):
+        """Avatar for a user/member, downloaded at most once per hash, format and size"""
+
+        if format is None:
+            format = 'gif' if user.is_avatar_animated() else static_format
+
+        if self._hashes.get(user.id, user.avatar) != user.avatar:
+            self.invalidate(user.id)
+
+        key = (user.id, user.avatar, format, size)
+        data = self._entries.get(key)
+        if data is not None:
+            self._entries.move_to_end(key)
+            self.stats['hits'] += 1
+        else:
+            self.stats['misses'] += 1
+            if key not in self._inflight:
+                task = self.client.loop.create_task(self._download(user, key))
+                self._inflight[key] = task
+                task.add_done_callback(lambda _: self._inflight.pop(key, None))
+            data = await shield(self._inflight[key])
+
+        # Animated avatars are streamed per frame, never kept decoded
+        return Avatar(key if self.decoded and format != 'gif' else None, data, format == 'gif')
+
+    async def _download(self, user, key):
+        _, avatar, format, size = key
+        data = await user.avatar_url_as(format=format, size=size).read()
+
+        # The avatar may have changed while downloading, don't cache an outdated one
+        if self._hashes.setdefault(user.id, avatar) == avatar:
+            self._entries[key] = data
+            self.bytes += len(data)
+            self._evict()
+
+        return data
+
+    def _evict(self):
+        while self.bytes > self.max_bytes and self._entries:
+            (user_id, *_), data = self._entries.popitem(last=False)
+            self.bytes -= len(data)
+            self.stats['evictions'] += 1
+            if not any(key[0] == user_id for key in self._entries):
+                self._hashes.pop(user_id, None)
+
+    def invalidate(self, user_id):
+        """Forget every cached avatar of a user"""
+
+        for key in [key for key in self._entries if key[0] == user_id]:
+            self.bytes -= len(self._entries.pop(key))
+        self._hashes.pop(user_id, None)
+        self.stats['invalidations'] += 1
@@ -0,0 +1,185 @@
+# 3rd party modules
+from apscheduler.triggers.interval import IntervalTrigger
+
+# Builtin modules
+from re import compile
+from asyncio import Lock
+from pathlib import Path
+from time import perf_counter
+
+MIGRATION_FILE = compile(r'^(\d+)_(\w+)\.sql$')
+NO_TRANSACTION = '-- transaction: off'
+
+
+def find_migrations(path):
+    """Numbered migration scripts in a directory, ordered by version"""
+
+    migrations = []
+    for file in Path(path).iterdir():
+        match = MIGRATION_FILE.match(file.name)
+        if match:
+            migrations.append((int(match.group(1)), match.group(2), file))
+
+    versions = [version for version, _, _ in migrations]
+    if len(versions) != len(set(versions)):
+        raise ValueError(f"Duplicate migration versions in {path}")
+
+    return sorted(migrations)
+
+async def migrate(db, path):
+    """Apply every migration newer than the recorded schema version
+
+    Each script runs inside its own transaction together with its ``schema_version``
+    row, unless its first line is ``-- transaction: off`` (needed for statements such
+    as ``PRAGMA journal_mode``). Returns the versions that were applied.
+    """
+
+    await db.execute('CREATE TABLE IF NOT EXISTS schema_version (version integer PRIMARY KEY, name text, applied text DEFAULT CURRENT_TIMESTAMP)')
+    await db.commit()
+
+    cur = await db.execute('SELECT MAX(version) FROM schema_version')
+    current = (await cur.fetchone())[0] or 0
+    await cur.close()
+
+    applied = []
+    for version, name, file in find_migrations(path):
+        if version <= current:
+            continue
+
+        with open(file, 'r', encoding='utf-8') as script:
+            sql = script.read()
+
+        try:
+            if sql.startswith(NO_TRANSACTION):
+                await db.executescript(sql)
+            else:
+                await db.executescript(f"BEGIN;\n{sql}")
+            await db.execute('INSERT INTO schema_version (version, name) VALUES (?, ?)', (version, name))
+            await db.commit()
+
+        except Exception:
+            await db.rollback()
+            raise
+
+        print(f"Applied migration {version:04d}_{name}")
+        applied.append(version)
+
+    return applied
+
+
+class WriteQueue(object):
+    """Write-behind queue that group commits database mutations"""
+
+    def __init__(self, client, batch_size=100, interval=5):
+        self.client = client
+        self.batch_size = batch_size
+        self.interval = interval
+
+        self._writes = {}  # (table, key): (sql, params), last write wins
+        self._increments = {}  # (table, key): [sql, amount], summed
+        self._lock = Lock()
+        self._flush_task = None
+
+        self.stats = {'flushes': 0,
+                      'statements': 0,
+                      'coalesced': 0,
+                      'last_batch': 0,
+                      'max_batch': 0,
+                      'last_latency': 0.0,
+                      'max_latency': 0.0,
+                      'total_latency': 0.0}
+
+        client.scheduler.add_job(self.flush, IntervalTrigger(seconds=interval))
+
+    def __len__(self):
+        return len(self._writes) + len(self._increments)
+
+    def write(self, table, key, sql, params):
+        """Queue an INSERT/UPDATE/DELETE, replacing any pending write for the same row"""
+
+        if (table, key) in self._writes:
+            self.stats['coalesced'] += 1
+        # A newer write supersedes any increments queued before it
+        self._increments.pop((table, key), None)
+        self._writes[(table, key)] = (sql, params)
+        self._check()
+
+    def increment(self, table, key, sql, amount=1):
+        """Queue a counter increment, summed with pending increments for the same row
+
+        ``sql`` must take the amount then the key, e.g. ``UPDATE t SET n = n + ? WHERE id = ?``
+        """
+
+        pending = self._increments.get((table, key))
+        if pending:
+            pending[1] += amount
+            self.stats['coalesced'] += 1
+        else:
+            self._increments[(table, key)] = [sql, amount]
+        self._check()
+
+    def _check(self):
+        """Start a flush once the size threshold is reached"""
+
+        if len(self) >= self.batch_size and (not self._flush_task or self._flush_task.done()):
+            self._flush_task = self.client.loop.create_task(self.flush())
+
+    async def flush(self):
+        """Apply every pending mutation in a single transaction"""
+
+        async with self._lock:
+            if not len(self):
+                return
+
+            writes, self._writes = self._writes, {}
+            increments, self._increments = self._increments, {}
+
+            # Rows are unique per batch so statements can be grouped freely
+            grouped = {}
+            for sql, params in writes.values():
+                grouped.setdefault(sql, []).append(params)
+            for (table, key), (sql, amount) in increments.items():
+                grouped.setdefault(sql, []).append((amount, key))
+
+            start = perf_counter()
+            try:
+                cur = await self.client.db.cursor()
+                for sql, rows in grouped.items():
+                    await cur.executemany(sql, rows)
+                await cur.close()
+                await self.client.db.commit()
+
+            except Exception:
+                await self.client.db.rollback()
+                self._requeue(writes, increments)
+                raise
+
+            latency = (perf_counter() - start) * 1000
+            batch = len(writes) + len(increments)
+
+            self.stats['flushes'] += 1
+            self.stats['statements'] += batch
+            self.stats['last_batch'] = batch
+            self.stats['max_batch'] = max(self.stats['max_batch'], batch)
+            self.stats['last_latency'] = latency
+            self.stats['max_latency'] = max(self.stats['max_latency'], latency)
+            self.stats['total_latency'] += latency
+
+    def _requeue(self, writes, increments):
+        """Put a failed batch back without clobbering anything queued since"""
+
+        newer = set(self._writes)
+        for row, write in writes.items():
+            self._writes.setdefault(row, write)
+        for row, (sql, amount) in increments.items():
+            if row in newer:
+                continue
+            pending = self._increments.setdefault(row, [sql, 0])
+            pending[1] += amount
+
+    async def close(self):
+        """Flush everything that is still pending"""
+
+        if self._flush_task and not self._flush_task.done():
+            await self._flush_task
+        await self.flush()
@@ -0,0 +1,69 @@
+# 3rd party modules
+import discord
+
+# Builtin modules
+from difflib import get_close_matches
+
+UNLISTED = ('errors', 'events')  # Modules left out of the module list
+
+
+class HelpIndex(object):
+    """Help pages for every module and command, built once per cog load/unload
+
+    Lookups by module name, command name or alias are single dict hits. The embeds
+    are prebuilt without anything that depends on the invoking user or guild, ``help``
+    copies one and adds those.
+    """
+
+    def __init__(self, client):
+        self.client = client
+
+        self.module_list = discord.Embed(title='🔧 Module List')
+        self.modules = {}  # module name (lowercase): Embed
+        self.commands = {}  # command name or alias (lowercase): Embed
+        self._suggestions = ()  # Names "did you mean" can offer
+
+    def build(self):
+        """Rebuild the index from the cogs currently loaded"""
+
+        module_list = discord.Embed(title='🔧 Module List')
+        modules = {}
+        commands = {}
+        suggestions = []
+
+        for name, cog in self.client.cogs.items():
+            if name.lower() not in UNLISTED:
+                module_list.add_field(name=name, value=cog.__doc__, inline=False)
+
+            embed = discord.Embed(title=f"🚧 {name.title()} Command List")
+            embed.description = f"**{name.title()} - {cog.__doc__}**"
+            for command in cog.get_commands():
+                if not command.hidden:
+                    usage = f"{command.qualified_name} {command.signature}".rstrip()
+                    embed.add_field(name=f"`{usage}`", value=f"{command.help}", inline=False)
+
+                page = self._command_page(command)
+                for key in (command.name, *command.aliases):
+                    commands[key.lower()] = page
+                if not command.hidden:
+                    suggestions.extend((command.name, *command.aliases))
+
+            modules[name.lower()] = embed
+            suggestions.append(name.lower())
+
+        self.module_list, self.modules, self.commands = module_list, modules, commands
+        self._suggestions = tuple(suggestions)
+
+    @staticmethod
+    def _command_page(command):
+        embed = discord.Embed(title='🔧 Command Syntax', description='GuhBot\'s commands and how to use them.')
+        embed.add_field(name=f"{command.name} - {command.help}",
+                        value=f"Proper Syntax:\n`{command.qualified_name} {command.signature}`",
+                        inline=False)
+        embed.add_field(name='Command Aliases', value=', '.join(command.aliases) or 'No Aliases', inline=False)
+        return embed
+
+    def suggest(self, name, n=3):
+        """Closest module or command names to a lookup that missed"""
+
+        return get_close_matches(name.lower(), self._suggestions, n=n, cutoff=0.6)
@@ -0,0 +1,132 @@
+# 3rd party modules
+from aiohttp import ClientSession, ClientTimeout, TCPConnector
+
+# Builtin modules
+from asyncio import shield
+from time import monotonic
+from collections import OrderedDict
+
+
+def create_session(limit=100, limit_per_host=10, dns_ttl=300, timeout=10, connect_timeout=5, trace_configs=None):
+    """Pooled keep-alive session shared by every outbound API call"""
+
+    connector = TCPConnector(limit=limit,
+                             limit_per_host=limit_per_host,
+                             use_dns_cache=True,
+                             ttl_dns_cache=dns_ttl,
+                             keepalive_timeout=30)
+    return ClientSession(connector=connector,
+                         timeout=ClientTimeout(total=timeout, connect=connect_timeout),
+                         raise_for_status=False,
+                         trace_configs=trace_configs)
+
+
+class ResponseCache(object):
+    """URL keyed JSON cache with per-endpoint TTLs, LRU eviction,
+    stale-while-revalidate and single-flight fetching"""
+
+    def __init__(self, client, ttls=None, max_entries=256):
+        self.client = client
+        self.max_entries = max_entries
+        # url prefix: (fresh seconds, extra seconds a stale copy may still be served)
+        self.ttls = ttls or {}
+
+        self._entries = OrderedDict()  # url: (fresh_until, stale_until, data)
+        self._inflight = {}  # url: Task
+
+        self.stats = {'hits': 0,
+                      'stale': 0,
+                      'misses': 0,
+                      'refreshes': 0,
+                      'coalesced': 0,
+                      'evictions': 0,
+                      'errors': 0,
+                      'uncached': 0}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def ttl(self, url):
+        """(fresh, stale) lifetime for a url, (0, 0) if it is never cached"""
+
+        for prefix, ttl in self.ttls.items():
+            if url.startswith(prefix):
+                return ttl
+        return (0, 0)
+
+    async def get_json(self, url, refresh=False):
+        """(status, data) for a GET request, data is None unless the status is 200
+
+        refresh skips any cached copy, fresh or stale, and stores the new response.
+        The returned data may be shared with other callers and must not be mutated.
+        """
+
+        with self.client.instruments.timed('http'):
+            return await self._get_json(url, refresh)
+
+    async def _get_json(self, url, refresh=False):
+        fresh, stale = self.ttl(url)
+        if not fresh:
+            self.stats['uncached'] += 1
+            return await self._fetch(url, store=False)
+
+        now = monotonic()
+        entry = self._entries.get(url)
+        if entry and not refresh:
+            fresh_until, stale_until, data = entry
+            if now < fresh_until:
+                self._entries.move_to_end(url)
+                self.stats['hits'] += 1
+                return 200, data
+
+            if now < stale_until:
+                self._entries.move_to_end(url)
+                self.stats['stale'] += 1
+                if url not in self._inflight:
+                    self.stats['refreshes'] += 1
+                    self._start(url)
+                return 200, data
+
+        self.stats['refreshes' if entry else 'misses'] += 1
+        if url in self._inflight:
+            self.stats['coalesced'] += 1
+            return await shield(self._inflight[url])
+        return await shield(self._start(url))
+
+    def _start(self, url):
+        """Single-flight fetch, concurrent callers share the same task"""
+
+        task = self.client.loop.create_task(self._fetch(url))
+        self._inflight[url] = task
+        task.add_done_callback(lambda done: self._finish(url, done))
+        return task
+
+    def _finish(self, url, task):
+        self._inflight.pop(url, None)
+        if not task.cancelled():
+            # Retrieve the exception so failed background refreshes are not reported as unhandled
+            task.exception()
+
+    async def _fetch(self, url, store=True):
+        try:
+            async with self.client.session.get(url) as response:
+                status = response.status
+                data = await response.json() if status == 200 else None
+
+        except Exception:
+            self.stats['errors'] += 1
+            raise
+
+        if store and status == 200:
+            fresh, stale = self.ttl(url)
+            now = monotonic()
+            self._entries[url] = (now + fresh, now + fresh + stale, data)
+            self._entries.move_to_end(url)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats['evictions'] += 1
+
+        return status, data
+
+    def clear(self):
+        self._entries.clear()
@@ -0,0 +1,177 @@
+# 3rd party modules
+from aiohttp import web
+from discord.ext.commands import Context
+from apscheduler.triggers.interval import IntervalTrigger
+
+# Builtin modules
+import os
+from time import perf_counter
+from contextvars import ContextVar
+from contextlib import contextmanager
+
+# Histogram bucket upper bounds in milliseconds, Prometheus style (cumulative, plus +Inf)
+BUCKETS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+PHASES = ('total', 'db', 'http', 'send')
+
+# Time spent per phase by the command running in the current task
+_timing = ContextVar('command_timing', default=None)
+
+
+class Histogram(object):
+    """Latency histogram with fixed buckets"""
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)  # Last bucket is +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        for i, bound in enumerate(BUCKETS):
+            if value <= bound:
+                break
+        else:
+            i = len(BUCKETS)
+        self.counts[i] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q quantile, inf past the last bucket"""
+
+        if not self.count:
+            return 0.0
+
+        seen = 0
+        for bound, count in zip(BUCKETS + (float('inf'),), self.counts):
+            seen += count
+            if seen >= q * self.count:
+                return float(bound)
+        return float('inf')
+
+
+class CommandStats(object):
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.latency = {phase: Histogram() for phase in PHASES}
+
+
+class InstrumentedContext(Context):
+    """Context whose sends are charged to the command as Discord time"""
+
+    async def send(self, *args, **kwargs):
+        with self.bot.instruments.timed('send'):
+            return await super().send(*args, **kwargs)
+
+
+class Instruments(object):
+    """Per-command call counts, error counts and latency histograms
+
+    ``before``/``after`` are registered as the bot's invoke hooks. Code that talks to
+    the database, outbound HTTP or Discord wraps the call in ``timed(phase)`` so the
+    time is also charged to the command that is running.
+    """
+
+    def __init__(self, client, path=None, interval=60, port=None):
+        self.client = client
+        self.path = path
+        self.port = port
+        self.commands = {}  # qualified name: CommandStats
+        self._runner = None
+
+        if path:
+            client.scheduler.add_job(self.export, IntervalTrigger(seconds=interval))
+
+    def command(self, ctx):
+        return self.commands.setdefault(ctx.command.qualified_name, CommandStats())
+
+    async def before(self, ctx):
+        _timing.set({'start': perf_counter(), 'db': 0.0, 'http': 0.0, 'send': 0.0})
+
+    async def after(self, ctx):
+        timing = _timing.get()
+        if timing is None:
+            return
+        _timing.set(None)
+
+        stats = self.command(ctx)
+        stats.calls += 1
+        stats.latency['total'].observe((perf_counter() - timing['start']) * 1000)
+        for phase in ('db', 'http', 'send'):
+            stats.latency[phase].observe(timing[phase])
+
+    def error(self, ctx):
+        """Count a failed invocation, including ones stopped by checks or cooldowns"""
+
+        if ctx.command:
+            self.command(ctx).errors += 1
+
+    @contextmanager
+    def timed(self, phase):
+        """Charge the time spent in the block to the running command, if any"""
+
+        timing = _timing.get()
+        if timing is None:
+            yield
+            return
+
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            timing[phase] += (perf_counter() - start) * 1000
+
+    def render(self):
+        """Prometheus text exposition of every command's counters and histograms"""
+
+        commands = sorted(self.commands.items())
+        lines = ['# TYPE guhbot_command_calls_total counter']
+        lines.extend(f'guhbot_command_calls_total{{command="{name}"}} {stats.calls}' for name, stats in commands)
+        lines.append('# TYPE guhbot_command_errors_total counter')
+        lines.extend(f'guhbot_command_errors_total{{command="{name}"}} {stats.errors}' for name, stats in commands)
+
+        lines.append('# TYPE guhbot_command_latency_ms histogram')
+        for name, stats in commands:
+            for phase, histogram in stats.latency.items():
+                labels = f'command="{name}",phase="{phase}"'
+                cumulative = 0
+                for bound, count in zip(BUCKETS + ('+Inf',), histogram.counts):
+                    cumulative += count
+                    lines.append(f'guhbot_command_latency_ms_bucket{{{labels},le="{bound}"}} {cumulative}')
+                lines.append(f'guhbot_command_latency_ms_sum{{{labels}}} {histogram.sum:.3f}')
+                lines.append(f'guhbot_command_latency_ms_count{{{labels}}} {histogram.count}')
+
+        return '\n'.join(lines) + '\n'
+
+    async def export(self):
+        """Write the Prometheus text file off the event loop, replaced atomically for the scraper"""
+
+        text, temp = self.render(), f"{self.path}.tmp"
+
+        def write():
+            with open(temp, 'w', encoding='utf-8') as file:
+                file.write(text)
+            os.replace(temp, self.path)
+
+        await self.client.loop.run_in_executor(None, write)
+
+    async def serve(self):
+        """Serve /metrics on localhost when a port is configured"""
+
+        if not self.port or self._runner:
+            return
+
+        async def metrics(request):
+            return web.Response(text=self.render(), content_type='text/plain')
+
+        app = web.Application()
+        app.router.add_get('/metrics', metrics)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, '127.0.0.1', self.port).start()
+
+    async def close(self):
+        if self._runner:
+            await self._runner.cleanup()
+        if self.path:
+            await self.export()
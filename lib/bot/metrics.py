@@ -0,0 +1,119 @@
+# 3rd party modules
+from psutil import Process, virtual_memory
+from apscheduler.triggers.interval import IntervalTrigger
+
+# Builtin modules
+from math import isfinite
+from array import array
+from time import time
+from asyncio import get_event_loop
+
+# Sampled values, in the order they are stored
+FIELDS = ('cpu', 'rss', 'lag', 'latency', 'guilds', 'users', 'commands', 'cpu_time')
+
+
+class RingBuffer(object):
+    """Fixed number of timestamped samples, one flat array of doubles per field"""
+
+    def __init__(self, fields, size):
+        self.fields = fields
+        self.size = size
+
+        self._times = array('d', bytes(8 * size))
+        self._columns = {field: array('d', bytes(8 * size)) for field in fields}
+        self._next = 0
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def append(self, timestamp, values):
+        """Store a sample, overwriting the oldest one once full"""
+
+        self._times[self._next] = timestamp
+        for field in self.fields:
+            self._columns[field][self._next] = values[field]
+
+        self._next = (self._next + 1) % self.size
+        self._count = min(self._count + 1, self.size)
+
+    def latest(self):
+        """Newest sample as {'time', field: value}, or None when empty"""
+
+        if not self._count:
+            return None
+
+        i = (self._next - 1) % self.size
+        sample = {field: column[i] for field, column in self._columns.items()}
+        sample['time'] = self._times[i]
+        return sample
+
+    def window(self, seconds, now=None):
+        """{field: (min, avg, max)} over the samples taken in the last seconds"""
+
+        since = (now or time()) - seconds
+        rows = [(i - self._count + self._next) % self.size for i in range(self._count)]
+        rows = [i for i in rows if self._times[i] >= since]
+        if not rows:
+            return {}
+
+        summary = {}
+        for field, column in self._columns.items():
+            values = [column[i] for i in rows]
+            summary[field] = (min(values), sum(values) / len(values), max(values))
+        return summary
+
+
+class MetricsSampler(object):
+    """Scheduled sampling of process, event loop and gateway health"""
+
+    def __init__(self, client, interval=5, size=720):
+        self.client = client
+        self.interval = interval
+        self.samples = RingBuffer(FIELDS, size)
+
+        self.process = Process()
+        self.started = self.process.create_time()
+        self.memory_total = virtual_memory().total
+        self.process.cpu_percent()  # First call only sets the baseline
+
+        self.commands = 0  # Invocations so far, counted by on_command
+        self._last = (time(), 0)  # (time, commands) of the previous sample
+
+        client.scheduler.add_job(self.sample, IntervalTrigger(seconds=interval))
+
+    async def sample(self):
+        """Record and return one snapshot"""
+
+        loop = get_event_loop()
+        waiter = loop.create_future()
+        start = loop.time()
+        loop.call_soon(waiter.set_result, None)
+        await waiter  # Time for one pass through the callbacks already queued
+        lag = (loop.time() - start) * 1000
+
+        now = time()
+        last_time, last_commands = self._last
+        rate = (self.commands - last_commands) / (now - last_time) * 60 if now > last_time else 0.0
+        self._last = (now, self.commands)
+
+        with self.process.oneshot():
+            cpu = self.process.cpu_percent()
+            rss = self.process.memory_info().rss
+            cpu_times = self.process.cpu_times()
+
+        latency = self.client.latency * 1000
+        self.samples.append(now, {'cpu': cpu,
+                                  'rss': rss / 1024**2,
+                                  'lag': lag,
+                                  'latency': latency if isfinite(latency) else 0.0,
+                                  'guilds': len(self.client.guilds),
+                                  'users': len(self.client.users_tally),
+                                  'commands': rate,
+                                  'cpu_time': cpu_times.user + cpu_times.system})
+        return self.samples.latest()
+
+    async def latest(self):
+        """Newest snapshot, taking one now if the job has not run yet"""
+
+        return self.samples.latest() or await self.sample()
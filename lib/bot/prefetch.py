@@ -0,0 +1,141 @@
+# 3rd party modules
+from apscheduler.triggers.interval import IntervalTrigger
+
+# Builtin modules
+from time import monotonic
+from asyncio import Semaphore
+from datetime import datetime
+from collections import deque
+from urllib.parse import urlsplit
+
+
+class PrefetchPool(object):
+    """Bounded buffer of pre-fetched responses for one random-content endpoint
+
+    Fills share a per-host semaphore with every other pool on the same host. After a
+    failed request the pool stops refilling for a while, doubling the wait on each
+    failure in a row, so a struggling API is not hammered by refills.
+    """
+
+    def __init__(self, client, url, host, size=5, low_water=2, backoff=5, max_backoff=300):
+        self.client = client
+        self.url = url
+        self.host = host  # Semaphore shared by the pools of this host
+        self.size = size
+        self.low_water = low_water
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+
+        self._buffer = deque(maxlen=size)
+        self._task = None
+        self._delay = 0  # Seconds of the current backoff, 0 after a success
+        self._retry_at = 0.0  # No refills before this monotonic time
+
+        self.stats = {'served': 0, 'live': 0, 'fetched': 0, 'errors': 0, 'deferred': 0}
+
+    def __len__(self):
+        return len(self._buffer)
+
+    async def get_json(self):
+        """(status, data) from the buffer, or from a live request when it is drained"""
+
+        if self._buffer:
+            self.stats['served'] += 1
+            result = (200, self._buffer.popleft())
+        else:
+            self.stats['live'] += 1
+            try:
+                result = await self.client.api_cache.get_json(self.url)
+            except Exception:
+                self._failed()
+                raise
+
+            if result[0] == 200:
+                self._delay = self._retry_at = 0
+            else:
+                self._failed()
+
+        self.refill()
+        return result
+
+    def refill(self):
+        """Start topping up the buffer once it drops to the low-water mark"""
+
+        if len(self._buffer) > self.low_water or (self._task and not self._task.done()):
+            return
+
+        if monotonic() < self._retry_at:
+            self.stats['deferred'] += 1
+            return
+
+        self._task = self.client.loop.create_task(self._fill())
+
+    def _failed(self):
+        self.stats['errors'] += 1
+        self._delay = min(self._delay * 2, self.max_backoff) if self._delay else self.backoff
+        self._retry_at = monotonic() + self._delay
+
+    async def _fill(self):
+        # One request at a time per pool, and per host across pools,
+        # these APIs rate limit bursts from a single client
+        while len(self._buffer) < self.size:
+            try:
+                async with self.host:
+                    status, data = await self.client.api_cache.get_json(self.url)
+            except Exception:
+                self._failed()
+                return
+
+            if status != 200:
+                self._failed()
+                return
+
+            self._delay = 0
+            self._buffer.append(data)
+            self.stats['fetched'] += 1
+
+
+class Prefetcher(object):
+    """Prefetch pools keyed by URL, topped up on a schedule"""
+
+    def __init__(self, client, size=5, low_water=2, interval=30, per_host=2, backoff=5, max_backoff=300):
+        self.client = client
+        self.size = size
+        self.low_water = low_water
+        self.per_host = per_host
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.pools = {}
+        self.hosts = {}  # Host: Semaphore shared by its pools
+
+        # Runs once as soon as the scheduler starts in on_ready, however late, then keeps failed pools retrying
+        client.scheduler.add_job(self.top_up, IntervalTrigger(seconds=interval), next_run_time=datetime.now(),
+                                 misfire_grace_time=None)
+
+    def register(self, *urls):
+        """Declare endpoints so they are warmed before their first use"""
+
+        for url in urls:
+            if url not in self.pools:
+                host = urlsplit(url).netloc
+                if host not in self.hosts:
+                    self.hosts[host] = Semaphore(self.per_host)
+
+                self.pools[url] = PrefetchPool(self.client, url, self.hosts[host], size=self.size, low_water=self.low_water,
+                                               backoff=self.backoff, max_backoff=self.max_backoff)
+
+    async def get_json(self, url):
+        self.register(url)
+        return await self.pools[url].get_json()
+
+    async def top_up(self):
+        for pool in self.pools.values():
+            pool.refill()
+
+    @property
+    def stats(self):
+        totals = {'buffered': sum(len(pool) for pool in self.pools.values())}
+        for pool in self.pools.values():
+            for name, value in pool.stats.items():
+                totals[name] = totals.get(name, 0) + value
+        return totals
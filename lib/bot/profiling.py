@@ -0,0 +1,142 @@
+# Builtin modules
+import tracemalloc
+from io import StringIO
+from pathlib import Path
+from cProfile import Profile
+from pstats import Stats
+from asyncio import sleep
+from datetime import datetime
+
+
+class Profiler(object):
+    """On-demand cProfile and tracemalloc reports, written to disk
+
+    Nothing is profiled or traced until an owner asks for it, until then the invoke
+    hooks only check that nothing is armed. cProfile sees the whole thread, so a
+    command profile also includes whatever else the loop ran while it was awaiting.
+    """
+
+    def __init__(self, client, path='./data/profiles', top=15):
+        self.client = client
+        self.path = Path(path)
+        self.top = top
+
+        self.armed = None  # [qualified command name, invocations left, channel to report to]
+        self._profile = None  # Profile in progress, only one can be enabled at a time
+        self._running = 0  # Armed invocations in flight
+        self._snapshot = None  # Last tracemalloc snapshot
+
+    @property
+    def busy(self):
+        return self._profile is not None
+
+    def arm(self, command, invocations, channel):
+        """Profile the next invocations of a command"""
+
+        self._profile = Profile()
+        self.armed = [command, invocations, channel]
+
+    def disarm(self):
+        """Drop an armed command profile without a report, returns the command it was armed for"""
+
+        if self.armed is None:
+            return None
+
+        if self._running:
+            self._profile.disable()
+        (name, _, _), self.armed = self.armed, None
+        self._profile = None
+        self._running = 0
+        return name
+
+    def before(self, ctx):
+        if self.armed is None or ctx.command.qualified_name != self.armed[0]:
+            return
+
+        if not self._running:
+            self._profile.enable()
+        self._running += 1
+
+    def after(self, ctx):
+        if not self._running or ctx.command.qualified_name != self.armed[0]:
+            return
+
+        # Concurrent invocations share one profile, it runs until the last one finishes
+        self._running -= 1
+        if not self._running:
+            self._profile.disable()
+
+        self.armed[1] -= 1
+        if self.armed[1] <= 0 and not self._running:
+            (name, _, channel), self.armed = self.armed, None
+            profile, self._profile = self._profile, None
+            self.client.loop.create_task(self._report(profile, name, channel))
+
+    async def _report(self, profile, name, channel):
+        file, summary = await self.write_profile(profile, name)
+        await channel.send(f"Profile for `{name}` written to `{file}`\n```\n{summary}\n```")
+
+    async def profile_loop(self, seconds):
+        """(report file, summary) for everything the event loop runs for a few seconds"""
+
+        profile = self._profile = Profile()
+        profile.enable()
+        try:
+            await sleep(seconds)
+        finally:
+            profile.disable()
+            self._profile = None
+        return await self.write_profile(profile, 'loop')
+
+    async def write_profile(self, profile, name):
+        """Write the full report sorted by cumulative time, return (file, top-N summary)"""
+
+        stream = StringIO()
+        Stats(profile, stream=stream).sort_stats('cumulative').print_stats()
+        file = await self._write(f"profile-{name}", stream.getvalue())
+
+        stream = StringIO()
+        Stats(profile, stream=stream).sort_stats('cumulative').print_stats(self.top)
+        return file, self._summary(stream.getvalue())
+
+    async def snapshot(self):
+        """(report file, summary) for a tracemalloc snapshot, diffed against the previous one
+
+        The first call starts tracing, so only allocations made after it are seen.
+        """
+
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._snapshot = None
+
+        snapshot = tracemalloc.take_snapshot().filter_traces((tracemalloc.Filter(False, tracemalloc.__file__),))
+        if self._snapshot is None:
+            stats, title = snapshot.statistics('lineno'), 'Top allocations'
+        else:
+            stats, title = snapshot.compare_to(self._snapshot, 'lineno'), 'Top allocation changes since the last snapshot'
+        self._snapshot = snapshot
+
+        report = '\n'.join(str(stat) for stat in stats)
+        file = await self._write('memory', f"{title}\n{report}\n")
+        return file, self._summary('\n'.join(str(stat) for stat in stats[:self.top]))
+
+    def stop_tracing(self):
+        self._snapshot = None
+        tracemalloc.stop()
+
+    async def _write(self, name, report):
+        file = self.path / f"{name}-{datetime.now():%Y%m%d-%H%M%S}.txt"
+
+        def write():
+            self.path.mkdir(parents=True, exist_ok=True)
+            file.write_text(report, encoding='utf-8')
+
+        await self.client.loop.run_in_executor(None, write)
+        return file
+
+    @staticmethod
+    def _summary(text, limit=1800):
+        """Trimmed to fit a Discord message"""
+
+        text = text.strip()
+        return text if len(text) <= limit else text[:limit] + '\n...'
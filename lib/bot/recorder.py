@@ -0,0 +1,120 @@
+# Builtin modules
+import gzip
+import json
+from time import monotonic
+from pathlib import Path
+from asyncio import Lock
+from datetime import datetime
+
+RECORDED = ('message', 'message_delete', 'member_update', 'member_join', 'member_remove')
+
+
+class Recorder(object):
+    """Compact, anonymized recording of dispatched gateway events, for bench.replay
+
+    Each event is one gzipped JSON line ``[seconds since start, event, fields]``.
+    Ids are replaced by small numbers in order of first appearance, consistent within
+    a recording and unlinkable across recordings. Message text is never stored, only
+    its length, the command it invoked and who it mentioned.
+    """
+
+    def __init__(self, client, path='./data/recordings', buffer=500):
+        self.client = client
+        self.path = Path(path)
+        self.buffer = buffer
+
+        self.file = None
+        self.events = 0
+        self._rows = []
+        self._ids = {}  # Discord id: anonymized id
+        self._start = None
+        self._lock = Lock()
+        self._flush_task = None
+
+    @property
+    def recording(self):
+        return self.file is not None
+
+    def start(self):
+        """Start a new recording file, returns its path"""
+
+        self.file = self.path / f"gateway-{datetime.now():%Y%m%d-%H%M%S}.jsonl.gz"
+        self.events = 0
+        self._ids = {}
+        self._start = monotonic()
+        return self.file
+
+    async def stop(self):
+        """(path, events) of the finished recording"""
+
+        file, events = self.file, self.events
+        await self.flush()
+        self.file = None
+        return file, events
+
+    def anonymize(self, id):
+        return self._ids.setdefault(id, len(self._ids) + 1)
+
+    def record(self, event, args):
+        if event not in RECORDED:
+            return
+
+        if event == 'message':
+            fields = self._message(args[0])
+        elif event == 'message_delete':
+            message = args[0]
+            fields = {'g': self._guild(message.guild), 'c': self.anonymize(message.channel.id),
+                      'a': self.anonymize(message.author.id), 'n': len(message.content)}
+        else:
+            member = args[-1]  # member_update passes (before, after)
+            fields = {'g': self._guild(member.guild), 'u': self.anonymize(member.id), 'b': int(member.bot)}
+
+        self._rows.append(json.dumps([round(monotonic() - self._start, 3), event, fields], separators=(',', ':')))
+        self.events += 1
+        if len(self._rows) >= self.buffer and (not self._flush_task or self._flush_task.done()):
+            self._flush_task = self.client.loop.create_task(self.flush())
+
+    def _guild(self, guild):
+        return self.anonymize(guild.id) if guild else None
+
+    def _message(self, message):
+        content = message.content
+        fields = {'g': self._guild(message.guild), 'c': self.anonymize(message.channel.id),
+                  'a': self.anonymize(message.author.id), 'b': int(message.author.bot), 'n': len(content)}
+
+        mentions = [self.anonymize(user.id) for user in message.mentions if not user.bot]
+        if mentions:
+            fields['m'] = mentions
+
+        bot_mention = f"<@!{self.client.user.id}>"
+        if content == bot_mention:
+            fields['bm'] = 1
+            return fields
+
+        prefix = self.client.prefixes.get(message.guild.id, self.client.default_prefix) if message.guild else self.client.default_prefix
+        for used in (prefix, f"{bot_mention} "):
+            if content.startswith(used):
+                words = content[len(used):].split(maxsplit=1)
+                command = self.client.get_command(words[0]) if words else None
+                if command:
+                    # Command names are public, arguments may not be and are dropped
+                    fields['cmd'] = command.qualified_name
+                break
+
+        return fields
+
+    async def flush(self):
+        """Append buffered events to the recording, off the event loop"""
+
+        async with self._lock:  # Appends must not interleave
+            if not self._rows or not self.file:
+                return
+            rows, self._rows = self._rows, []
+            file = self.file
+
+            def write():
+                self.path.mkdir(parents=True, exist_ok=True)
+                with gzip.open(file, 'at', encoding='utf-8') as stream:
+                    stream.write('\n'.join(rows) + '\n')
+
+            await self.client.loop.run_in_executor(None, write)
@@ -0,0 +1,101 @@
+# Builtin modules
+from os import remove
+from pathlib import Path
+from hashlib import sha1
+from shutil import rmtree
+from collections import OrderedDict
+
+
+class RenderCache(object):
+    """Encoded output of deterministic image commands, keyed by (command, avatar, parameters)
+
+    Least recently used renders are evicted once the memory budget is exceeded. With
+    a spill path they move to disk instead and are evicted from there by their own budget.
+    """
+
+    def __init__(self, client, max_bytes=16 * 1024**2, spill_path=None, max_spill_bytes=128 * 1024**2):
+        self.client = client
+        self.max_bytes = max_bytes
+        self.max_spill_bytes = max_spill_bytes
+        self.bytes = 0
+        self.spill_bytes = 0
+
+        self._entries = OrderedDict()  # key: bytes
+        self._spilled = OrderedDict()  # key: (path, size)
+
+        self.spill_path = Path(spill_path) if spill_path else None
+        if self.spill_path:
+            # Spilled files are only indexed in memory, start from an empty folder
+            rmtree(self.spill_path, ignore_errors=True)
+            self.spill_path.mkdir(parents=True, exist_ok=True)
+
+        self.stats = {'hits': 0, 'disk_hits': 0, 'misses': 0, 'evictions': 0, 'spills': 0}
+
+    def __len__(self):
+        return len(self._entries) + len(self._spilled)
+
+    async def get(self, key):
+        """Cached bytes for a render, None on a miss"""
+
+        data = self._entries.get(key)
+        if data is not None:
+            self._entries.move_to_end(key)
+            self.stats['hits'] += 1
+            return data
+
+        spilled = self._spilled.pop(key, None)
+        if spilled:
+            path, size = spilled
+            self.spill_bytes -= size
+            try:
+                data = await self.client.loop.run_in_executor(None, _read_and_remove, path)
+            except OSError:
+                data = None
+
+            if data is not None:
+                self.stats['disk_hits'] += 1
+                await self.put(key, data)
+                return data
+
+        self.stats['misses'] += 1
+        return None
+
+    async def put(self, key, data):
+        if key in self._entries:
+            return
+
+        self._entries[key] = data
+        self.bytes += len(data)
+
+        while self.bytes > self.max_bytes and self._entries:
+            evicted, evicted_data = self._entries.popitem(last=False)
+            self.bytes -= len(evicted_data)
+            if self.spill_path:
+                await self._spill(evicted, evicted_data)
+            else:
+                self.stats['evictions'] += 1
+
+    async def _spill(self, key, data):
+        path = self.spill_path / sha1(repr(key).encode()).hexdigest()
+        await self.client.loop.run_in_executor(None, path.write_bytes, data)
+        self._spilled[key] = (path, len(data))
+        self.spill_bytes += len(data)
+        self.stats['spills'] += 1
+
+        while self.spill_bytes > self.max_spill_bytes and self._spilled:
+            _, (old_path, size) = self._spilled.popitem(last=False)
+            self.spill_bytes -= size
+            self.stats['evictions'] += 1
+            await self.client.loop.run_in_executor(None, _remove, old_path)
+
+
+def _read_and_remove(path):
+    data = path.read_bytes()
+    remove(path)
+    return data
+
+def _remove(path):
+    try:
+        remove(path)
+    except OSError:
+        pass
@@ -0,0 +1,39 @@
+# Builtin modules
+from collections import Counter
+
+
+class UserTally(object):
+    """Unique user count kept up to date from member and guild events
+
+    Each user is reference counted by the number of cached guilds they share with
+    the bot, so the count is a len() instead of a set over every member.
+    """
+
+    def __init__(self):
+        self._guilds = Counter()  # user id: guilds shared with the bot
+
+    def __len__(self):
+        return len(self._guilds)
+
+    def rebuild(self, guilds):
+        """Recount from scratch, after the member cache is (re)filled on READY"""
+
+        self._guilds = Counter(member.id for guild in guilds for member in guild.members)
+
+    def add(self, user_id):
+        self._guilds[user_id] += 1
+
+    def remove(self, user_id):
+        count = self._guilds.get(user_id, 0) - 1
+        if count > 0:
+            self._guilds[user_id] = count
+        else:
+            self._guilds.pop(user_id, None)
+
+    def add_guild(self, guild):
+        for member in guild.members:
+            self.add(member.id)
+
+    def remove_guild(self, guild):
+        for member in guild.members:
+            self.remove(member.id)
@@ -0,0 +1,114 @@
+# Builtin modules
+import sys
+import logging
+import traceback
+from time import monotonic, time
+from pathlib import Path
+from threading import Thread, Event, get_ident
+from asyncio import sleep, current_task
+from collections import Counter, deque, namedtuple
+
+log = logging.getLogger(__name__)
+
+LIB = str(Path(__file__).resolve().parents[1])  # Frames under lib/ name the culprit
+
+# A callback that held the loop for longer than the threshold
+Stall = namedtuple('Stall', ('time', 'duration', 'culprit', 'stack'))
+
+
+class LoopWatchdog(object):
+    """Event loop lag monitor that catches blocking code in the act
+
+    A heartbeat coroutine measures how late each tick wakes up. A sampler thread
+    watches the heartbeat, and once it is older than the threshold captures the loop
+    thread's stack while it is still blocked. The stall is attributed to the command
+    whose task was running, or to the innermost frame in lib/ for listeners and jobs.
+    """
+
+    def __init__(self, client, interval=0.1, threshold=0.25, history=20):
+        self.client = client
+        self.interval = interval
+        self.threshold = threshold
+
+        self.lag = 0.0  # Seconds the last tick woke up late
+        self.stats = {'stalls': 0, 'stalled_ms': 0.0, 'max_stall_ms': 0.0}
+        self.culprits = Counter()
+        self.history = deque(maxlen=history)  # Recent Stall tuples
+
+        self._commands = {}  # Task: qualified command name
+        self._beat = None
+        self._captured = None  # (culprit, stack) taken by the sampler during the current stall
+        self._loop_thread = None
+        self._stop = Event()
+        self._thread = None
+
+    def start(self):
+        """Start the heartbeat and the sampler thread, from the loop thread"""
+
+        if self._thread:
+            return
+
+        self._loop_thread = get_ident()
+        self._beat = monotonic()
+        self.client.loop.create_task(self._heartbeat())
+        self._thread = Thread(target=self._sample, name='loop-watchdog', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def enter(self, ctx):
+        """Attribute the current task to a command until ``exit``"""
+
+        self._commands[current_task()] = ctx.command.qualified_name
+
+    def exit(self, ctx):
+        self._commands.pop(current_task(), None)
+
+    async def _heartbeat(self):
+        while not self._stop.is_set():
+            expected = monotonic() + self.interval
+            await sleep(self.interval)
+            now = monotonic()
+            self._beat = now
+            self.lag = max(now - expected, 0.0)
+
+            if self.lag >= self.threshold:
+                self._record(self.lag)
+            else:
+                self._captured = None  # Taken during a block too short to count, not this stall's
+
+    def _record(self, lag):
+        culprit, stack = self._captured or ('unknown', '')
+        self._captured = None
+
+        duration = lag * 1000
+        self.stats['stalls'] += 1
+        self.stats['stalled_ms'] += duration
+        self.stats['max_stall_ms'] = max(self.stats['max_stall_ms'], duration)
+        self.culprits[culprit] += 1
+        self.history.append(Stall(time(), duration, culprit, stack))
+
+        log.warning('Event loop blocked for %.0fms by %s\n%s', duration, culprit, stack)
+
+    def _sample(self):
+        while not self._stop.wait(self.interval / 2):
+            # The heartbeat is one interval old even when the loop is not lagging
+            if self._captured is None and monotonic() - self._beat >= self.interval + self.threshold:
+                self._captured = self._capture()
+
+    def _capture(self):
+        """(culprit, formatted stack) of the blocked loop thread"""
+
+        frame = sys._current_frames().get(self._loop_thread)
+        if frame is None:
+            return 'unknown', ''
+        stack = traceback.extract_stack(frame)
+
+        task = current_task(self.client.loop)
+        culprit = self._commands.get(task)
+        if culprit is None:
+            ours = [entry for entry in stack if entry.filename.startswith(LIB)]
+            culprit = f"{Path(ours[-1].filename).stem}.{ours[-1].name}" if ours else 'unknown'
+
+        return culprit, ''.join(traceback.format_list(stack[-15:]))
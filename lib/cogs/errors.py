@@ -11,6 +11,8 @@ class Errors(commands.Cog):
 
     @commands.Cog.listener()
     async def on_command_error(self, ctx, error):
+        self.client.instruments.error(ctx)
+
         if isinstance(error, commands.CommandOnCooldown):
             bucket = self.client.cooldown.get_bucket(ctx.message)
             retry_after = bucket.update_rate_limit()
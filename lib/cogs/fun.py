@@ -3,12 +3,22 @@ import discord
 import akinator
 from discord.ext import commands
 from typing import Union, Optional
-from asyncio import get_event_loop
+from asyncio import get_event_loop, gather
 from akinator.async_aki import Akinator
 
 # Builtin modules
 import random
-from aiohttp import request
+
+
+ANIMALS = ('dog', 'cat', 'bird', 'panda', 'fox', 'koala', 'kangaroo', 'racoon', 'whale')
+PIKACHU_URL = 'https://some-random-api.ml/img/pikachu'
+MEME_URL = 'https://meme-api.herokuapp.com/gimme'
+
+def animal_urls(animal):
+    """(image url, fact url) for an animal"""
+
+    return (f"https://some-random-api.ml/img/{'birb' if animal == 'bird' else animal}",
+            f"https://some-random-api.ml/facts/{animal}")
 
 
 class Fun(commands.Cog):
@@ -17,6 +27,9 @@ class Fun(commands.Cog):
     def __init__(self, client):
         self.client = client
 
+        # Random content, so replies can come straight from a prefetched buffer
+        client.prefetch.register(PIKACHU_URL, MEME_URL, *(url for animal in ANIMALS for url in animal_urls(animal)))
+
     @commands.command(aliases=['say', 'repeat'])
     @commands.cooldown(1, 3, commands.BucketType.user)
     @commands.has_permissions(embed_links=True, manage_messages=True)
@@ -35,41 +48,30 @@ class Fun(commands.Cog):
     async def animal(self, ctx, animal: str=None):
         """Dog, Cat, Racoon, Whale, Bird, Panda, Kangaroo, Fox, and Koala facts."""
 
-        animal_list = ('dog', 'cat', 'bird', 'panda', 'fox', 'koala', 'kangaroo', 'racoon', 'whale')
-
         if not animal:
-            animal = random.choice(animal_list)
-
-        if (animal := animal.lower()) in animal_list:
-            fact_url = f"https://some-random-api.ml/facts/{animal.lower()}"
-            img_url = f"https://some-random-api.ml/img/{'birb' if animal == 'bird' else animal}"
-
-            await ctx.trigger_typing()
-
-            async with request('GET', img_url, headers={}) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    img = data["link"]
+            animal = random.choice(ANIMALS)
+
+        if (animal := animal.lower()) in ANIMALS:
+            img_url, fact_url = animal_urls(animal)
+
+            # Image and fact come from separate pools, live fetches still run concurrently
+            (img_status, img_data), (fact_status, fact_data) = await gather(self.client.prefetch.get_json(img_url),
+                                                                            self.client.prefetch.get_json(fact_url))
+            img = img_data['link'] if img_status == 200 else None
+
+            if fact_status == 200:
+                embed = discord.Embed(title=f"{animal.title()} Fact",
+                                      url='https://some-random-api.ml/',
+                                      description=f"{fact_data['fact']}",
+                                      colour=ctx.author.colour,
+                                      timestamp=ctx.message.created_at)
+                embed.set_author(name=f"{ctx.author.name}#{ctx.author.discriminator}",
+                                 icon_url=ctx.author.avatar_url)
+                embed.set_image(url=img)
+                await ctx.send(embed=embed)
 
-                else:
-                    img = None
-
-            async with request('GET', fact_url, headers={}) as response:
-                if response.status == 200:
-                    data = await response.json()
-
-                    embed = discord.Embed(title=f"{animal.title()} Fact",
-                                          url='https://some-random-api.ml/',
-                                          description=f"{data['fact']}",
-                                          colour=ctx.author.colour,
-                                          timestamp=ctx.message.created_at)
-                    embed.set_author(name=f"{ctx.author.name}#{ctx.author.discriminator}",
-                                     icon_url=ctx.author.avatar_url)
-                    embed.set_image(url=img)
-                    await ctx.send(embed=embed)
-
-                else:
-                    await ctx.send(f"API returned a `{response.status} status.` Try again.")
+            else:
+                await ctx.send(f"API returned a `{fact_status} status.` Try again.")
 
         else:
             await ctx.send(f"Sorry {ctx.author.mention}, but I don\'t know any {animal} facts.")
@@ -102,55 +104,49 @@ class Fun(commands.Cog):
     async def pikachu(self, ctx):
         """Random gifs and images of your electric, yellow friend"""
 
-        api_url = "https://some-random-api.ml/img/pikachu"
+        status, data = await self.client.prefetch.get_json(PIKACHU_URL)
 
-        await ctx.trigger_typing()
-
-        async with request('GET', api_url, headers={}) as response:
-            if response.status == 200:
-                data = await response.json()
-                img = data["link"]
+        if status == 200:
+            img = data["link"]
 
-            else:
-                await ctx.send(f"API returned a `{response.status} status.` Try again.")
+        else:
+            await ctx.send(f"API returned a `{status} status.` Try again.")
+            return
 
-            embed = discord.Embed(title='Pikachu Pics',
-                                  url='https://some-random-api.ml/',
-                                  colour=ctx.author.colour,
-                                  timestamp=ctx.message.created_at)
-            embed.set_author(name=f"{ctx.author.name}#{ctx.author.discriminator}",
-                             icon_url=ctx.author.avatar_url)
-            embed.set_image(url=img)
-            await ctx.send(embed=embed)
+        embed = discord.Embed(title='Pikachu Pics',
+                              url='https://some-random-api.ml/',
+                              colour=ctx.author.colour,
+                              timestamp=ctx.message.created_at)
+        embed.set_author(name=f"{ctx.author.name}#{ctx.author.discriminator}",
+                         icon_url=ctx.author.avatar_url)
+        embed.set_image(url=img)
+        await ctx.send(embed=embed)
 
     @commands.command(aliases=['memes', 'joke', 'jokes', 'funny'])
     @commands.cooldown(1, 5, commands.BucketType.user)
     async def meme(self, ctx):
         """Meme Generator \n( ͡° ͜ʖ ͡°)"""
 
-        api_url = 'https://meme-api.herokuapp.com/gimme'
-
-        await ctx.trigger_typing()
+        status, data = await self.client.prefetch.get_json(MEME_URL)
 
-        async with request('GET', api_url, headers={}) as response:
-            if response.status == 200:
-                data = await response.json()
-                source = data['postLink']
-                subreddit = data['subreddit']
-                caption = data['title']
-                meme = data['url']
+        if status == 200:
+            source = data['postLink']
+            subreddit = data['subreddit']
+            caption = data['title']
+            meme = data['url']
 
-            else:
-                await ctx.send(f"API returned a `{response.status} status.` Try again.")
+        else:
+            await ctx.send(f"API returned a `{status} status.` Try again.")
+            return
 
-            embed = discord.Embed(title=caption,
-                                  url=source,
-                                  description=f"**Subreddit:** [r/{subreddit}](https://www.reddit.com/r/{subreddit}/)",
-                                  colour=ctx.author.colour,
-                                  timestamp=ctx.message.created_at)
-            embed.set_image(url=meme)
-            embed.set_footer(text='PS: Click on the meme above to read small text')
-            await ctx.send(embed=embed)
+        embed = discord.Embed(title=caption,
+                              url=source,
+                              description=f"**Subreddit:** [r/{subreddit}](https://www.reddit.com/r/{subreddit}/)",
+                              colour=ctx.author.colour,
+                              timestamp=ctx.message.created_at)
+        embed.set_image(url=meme)
+        embed.set_footer(text='PS: Click on the meme above to read small text')
+        await ctx.send(embed=embed)
 
     @commands.command(aliases=['chat', 'guhbot', 'reply', 'guhbot,', 'guh,'])
     @commands.cooldown(1, 5, commands.BucketType.user)
@@ -161,12 +157,12 @@ class Fun(commands.Cog):
 
         await ctx.trigger_typing()
 
-        async with request('GET', api_url, headers={}) as response:
-            if response.status == 200:
-                data = await response.json()
-                reply = data['response']
+        status, data = await self.client.api_cache.get_json(api_url)
+
+        if status == 200:
+            reply = data['response']
 
-                await ctx.send(reply)
+            await ctx.send(reply)
 
     @commands.command(aliases=['emote'])
     @commands.cooldown(1, 5, commands.BucketType.user)
@@ -212,28 +208,29 @@ class Fun(commands.Cog):
 
         await ctx.trigger_typing()
 
-        async with request('GET', api_url, headers={}) as response:
-            if response.status == 200:
-                data = await response.json()
-                quote = data['quote']
+        status, data = await self.client.api_cache.get_json(api_url)
 
-            else:
-                await ctx.send(f"API returned a `{response.status} status.` Try again.")
+        if status == 200:
+            quote = data['quote']
+
+        else:
+            await ctx.send(f"API returned a `{status} status.` Try again.")
+            return
 
-            embed = discord.Embed(title='Kanye West once said...',
-                                  url='https://kanye.rest/',
-                                  description=f"\"{quote}\"",
-                                  colour=ctx.author.colour,
-                                  timestamp=ctx.message.created_at)
+        embed = discord.Embed(title='Kanye West once said...',
+                              url='https://kanye.rest/',
+                              description=f"\"{quote}\"",
+                              colour=ctx.author.colour,
+                              timestamp=ctx.message.created_at)
 
-            img = random.choice(['https://cdn.discordapp.com/attachments/732800092045836338/755602650761920522/9k.png',
-                                 'https://cdn.discordapp.com/attachments/755144098578563164/755600589232013402/unknown.png',
-                                 'https://cdn.discordapp.com/attachments/732800092045836338/755600986315292773/GettyImages-599438126.png'])
+        img = random.choice(['https://cdn.discordapp.com/attachments/732800092045836338/755602650761920522/9k.png',
+                             'https://cdn.discordapp.com/attachments/755144098578563164/755600589232013402/unknown.png',
+                             'https://cdn.discordapp.com/attachments/732800092045836338/755600986315292773/GettyImages-599438126.png'])
             
-            embed.set_image(url=img)
-            embed.set_footer(text='Thank you Kanye, very cool!')
+        embed.set_image(url=img)
+        embed.set_footer(text='Thank you Kanye, very cool!')
 
-            await ctx.send(embed=embed)
+        await ctx.send(embed=embed)
 
     @commands.Cog.listener()
     async def on_ready(self):
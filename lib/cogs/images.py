@@ -1,13 +1,16 @@
 # 3rd party modules
 import discord
 from discord.ext import commands
-from typing import Union, Optional
-from PIL import Image, ImageOps
-from io import BytesIO
+from typing import Optional
 
 # Builtin modules
-import random
-from aiohttp import request
+from io import BytesIO
+
+# Local modules
+from lib.imaging import ops, chains, encoding, templates
+from lib.imaging.pool import RenderBusy, RenderTimeout
+
+TEMPLATES_PATH = 'lib/images/templates.json'
 
 
 class Images(commands.Cog):
@@ -16,6 +19,52 @@ class Images(commands.Cog):
     def __init__(self, client):
         self.client = client
 
+        # Decoded once here (and once per worker), reloading the cog picks up changes
+        self.templates = templates.load_registry(TEMPLATES_PATH)
+        templates.warm(self.templates.values())
+
+        self.stats = {}  # command: {'renders', 'baseline', 'bytes'}
+
+    async def render(self, ctx, member, chain):
+        """Encoded avatar after an operation chain, from the render cache or the render pool
+
+        Chains are deterministic so the output is cached by (user, avatar hash, chain),
+        cache hits skip the avatar download as well. Returns None when the job could not run.
+        """
+
+        key = (member.id, member.avatar, chain)
+        data = await self.client.renders.get(key)
+        if data is not None:
+            return data
+
+        try:
+            with self.client.instruments.timed('http'):
+                avatar = await self.client.avatars.read(member)
+            data, baseline = await self.client.render.run(ops.render, avatar, chain, self.client.image_encoding)
+            await self.client.renders.put(key, data)
+            self.record(ctx.command.qualified_name, baseline, len(data))
+            return data
+
+        except RenderBusy:
+            await ctx.send(f"Sorry {ctx.author.mention}, I\'m busy with a lot of images right now. Try again in a moment.")
+
+        except RenderTimeout:
+            await ctx.send(f"Sorry {ctx.author.mention}, that image took too long to make.")
+
+    def record(self, command, baseline, size):
+        """Count the bytes the encoding optimizer saved for a command over plain PNG/GIF output"""
+
+        stats = self.stats.setdefault(command, {'renders': 0, 'baseline': 0, 'bytes': 0})
+        stats['renders'] += 1
+        stats['baseline'] += baseline
+        stats['bytes'] += size
+
+    async def send_image(self, ctx, data, **kwargs):
+        """Upload rendered bytes straight from memory"""
+
+        filename = f"{ctx.command.name}.{encoding.extension(data)}"
+        await ctx.send(file=discord.File(BytesIO(data), filename=filename), **kwargs)
+
     @commands.command(aliases=['down_under', 'down-under', 'downunder'])
     @commands.cooldown(1, 10, commands.BucketType.user)
     async def australia(self, ctx, member: Optional[discord.Member]=None):
@@ -24,13 +73,10 @@ class Images(commands.Cog):
         if not member:
             member = ctx.author
 
-        pfp = member.avatar_url_as(size=128)
-        data = BytesIO(await pfp.read())
-        img = Image.open(data)
-        img = img.rotate(180)
-        img.save('lib/images/project.png')
+        data = await self.render(ctx, member, (('rotate', 180),))
 
-        await ctx.send(file=discord.File('lib/images/project.png'))
+        if data:
+            await self.send_image(ctx, data)
 
     @commands.command()
     @commands.cooldown(1, 10, commands.BucketType.user)
@@ -40,13 +86,10 @@ class Images(commands.Cog):
         if not member:
             member = ctx.author
 
-        pfp = member.avatar_url_as(size=128)
-        data = BytesIO(await pfp.read())
-        img = Image.open(data)
-        img = img.rotate(angle)
-        img.save('lib/images/project.png')
+        data = await self.render(ctx, member, (('rotate', angle),))
 
-        await ctx.send(file=discord.File('lib/images/project.png'))
+        if data:
+            await self.send_image(ctx, data)
 
     @commands.command(aliases=['greyscale', 'grey', 'gray'])
     @commands.cooldown(1, 10, commands.BucketType.user)
@@ -56,51 +99,63 @@ class Images(commands.Cog):
         if not member:
             member = ctx.author
 
-        pfp = member.avatar_url_as(static_format='png', size=128)
-        data = BytesIO(await pfp.read())
-        img = Image.open(data)
-        img = ImageOps.grayscale(img)
-        img.save('lib/images/project.png')
+        data = await self.render(ctx, member, (('grayscale',),))
+
+        if data:
+            await self.send_image(ctx, data)
+
+    async def send_overlay(self, ctx, name, member):
+        """Paste a member's avatar onto a template"""
+
+        template = self.templates[name]
+        data = await self.render(ctx, member, (('overlay', template),))
 
-        await ctx.send(file=discord.File('lib/images/project.png'))
+        if data:
+            await self.send_image(ctx, data, content=template.content)
 
     @commands.command()
     @commands.cooldown(1, 10, commands.BucketType.user)
     async def ross(self, ctx, member: Optional[discord.Member] = None):
         """Get a load of this guy"""
 
-        if not member:
-            member = ctx.author
-
-        bg = Image.open('lib/images/ross.png')
-
-        raw_pfp = member.avatar_url_as(static_format='png', size=128)
-        data = BytesIO(await raw_pfp.read())
-        pfp = Image.open(data)
-        pfp = pfp.resize((69, 69))
-        bg.paste(pfp, (4, 70))
-        bg.save('lib/images/project.png')
-        
-        await ctx.send(file=discord.File('lib/images/project.png'), content='Get a load of this guy') # TODO: add message
+        await self.send_overlay(ctx, 'ross', member or ctx.author)
 
     @commands.command()
     @commands.cooldown(1, 10, commands.BucketType.user)
     async def trash(self, ctx, member: Optional[discord.Member] = None):
         """Recycle bin maybe?"""
 
+        await self.send_overlay(ctx, 'trash', member or ctx.author)
+
+    @commands.command(aliases=['template', 'templates'])
+    @commands.cooldown(1, 10, commands.BucketType.user)
+    async def overlay(self, ctx, template: Optional[str]=None, member: Optional[discord.Member] = None):
+        """Put a profile picture on any meme template"""
+
+        if not template or template.lower() not in self.templates:
+            await ctx.send(f"Available templates: {', '.join(f'`{name}`' for name in self.templates)}")
+            return
+
+        await self.send_overlay(ctx, template.lower(), member or ctx.author)
+
+    @commands.command(aliases=['chain', 'effects'])
+    @commands.cooldown(1, 10, commands.BucketType.user)
+    async def edit(self, ctx, member: Optional[discord.Member]=None, *, operations: Optional[str]=None):
+        """Stack effects in one go, e.g. rotate:90 grayscale flip resize:64 overlay:trash"""
+
         if not member:
             member = ctx.author
 
-        bg = Image.open('lib/images/trash.png')
+        try:
+            chain = chains.parse(operations or '', self.templates)
+        except chains.ChainError as error:
+            await ctx.send(f"Sorry {ctx.author.mention}, {error}.\nExample: `edit @member rotate:90 grayscale overlay:trash`")
+            return
 
-        raw_pfp = member.avatar_url_as(static_format='png', size=128)
-        data = BytesIO(await raw_pfp.read())
-        pfp = Image.open(data)
-        pfp = pfp.resize((200, 200))
-        bg.paste(pfp, (117, 127))
-        bg.save('lib/images/project.png')
+        data = await self.render(ctx, member, chain)
 
-        await ctx.send(file=discord.File('lib/images/project.png'))
+        if data:
+            await self.send_image(ctx, data)
 
     @commands.Cog.listener()
     async def on_ready(self):
@@ -4,7 +4,6 @@ from aiosqlite import connect
 from discord.ext import commands
 from typing import Optional, Union
 from apscheduler.triggers.cron import CronTrigger
-from psutil import Process, virtual_memory, cpu_percent
 
 # Builtin modules
 from os import getcwd
@@ -22,14 +21,15 @@ class Meta(commands.Cog):
     def __init__(self, client):
         self.client = client
         self._message = 'watching @GuhBot | {guilds:,} servers & {users:,} users | version {version:s}'
+        self._status = None  # Last status sent to the gateway
 
-        client.scheduler.add_job(self.set, CronTrigger(second=0))
+        self._status_job = client.scheduler.add_job(self.set, CronTrigger(second=0))
 
     @property
     def message(self):
         """Status formatter"""
 
-        return self._message.format(guilds=len(self.client.guilds), users=len(set(self.client.get_all_members())), version=self.client.version)
+        return self._message.format(guilds=len(self.client.guilds), users=len(self.client.users_tally), version=self.client.version)
 
     @message.setter
     def message(self, value):
@@ -39,19 +39,24 @@ class Meta(commands.Cog):
             raise ValueError('Invalid discord.Activity type.')
         self._message = value
 
-    async def set(self):
-        """Set the current bot status"""
+    async def set(self, force=False):
+        """Set the current bot status, unless it is unchanged"""
+
+        message = self.message
+        if message == self._status and not force:
+            return
 
         try:
-            _type, _name = self.message.split(' ', maxsplit=1)
+            _type, _name = message.split(' ', maxsplit=1)
 
         except ValueError:
             _type = 'watching'
-            _name = self.message
+            _name = message
 
         await self.client.change_presence(activity=discord.Activity(name=_name, 
         type=getattr(discord.ActivityType, _type, discord.ActivityType.watching),
         ))
+        self._status = message
 
     @commands.command(aliases=['status'], hidden=True)
     @commands.is_owner()
@@ -64,8 +69,7 @@ class Meta(commands.Cog):
 
         self._message = status
 
-        for job in self.client.scheduler.get_jobs():
-            job.modify(next_run_time=datetime.now())
+        self._status_job.modify(next_run_time=datetime.now())
 
         await ctx.send(f"Set status to `{status}`")
     
@@ -80,93 +84,219 @@ class Meta(commands.Cog):
 
         await ctx.send('Updated all schedules')
 
+    @commands.command(aliases=['db_stats', 'writes'], hidden=True)
+    @commands.is_owner()
+    @commands.cooldown(1, 5, commands.BucketType.user)
+    async def dbstats(self, ctx):
+        """Database write queue statistics"""
+
+        writes = self.client.writes
+        stats = writes.stats
+        average_batch = stats['statements'] / stats['flushes'] if stats['flushes'] else 0
+        average_latency = stats['total_latency'] / stats['flushes'] if stats['flushes'] else 0
+
+        embed = discord.Embed(title='🗄️ Write Queue',
+                              description=f"Flushing every **{writes.interval}s** or **{writes.batch_size}** pending writes.",
+                              colour=ctx.author.colour,
+                              timestamp=ctx.message.created_at)
+        fields = [('Pending', f"{len(writes):,d}", True),
+                  ('Flushes', f"{stats['flushes']:,d}", True),
+                  ('Coalesced', f"{stats['coalesced']:,d}", True),
+                  ('Batch Size', f"last **{stats['last_batch']}** / avg **{average_batch:.1f}** / max **{stats['max_batch']}**", False),
+                  ('Flush Latency', f"last **{stats['last_latency']:.3f}ms** / avg **{average_latency:.3f}ms** / max **{stats['max_latency']:.3f}ms**", False)]
+        for name, value, inline in fields:
+            embed.add_field(name=name, value=value, inline=inline)
+        await ctx.send(embed=embed)
+
+    @commands.command(aliases=['cache_stats', 'apicache'], hidden=True)
+    @commands.is_owner()
+    @commands.cooldown(1, 5, commands.BucketType.user)
+    async def cachestats(self, ctx):
+        """API response cache and prefetch pool statistics"""
+
+        cache = self.client.api_cache
+        stats = cache.stats
+        lookups = stats['hits'] + stats['stale'] + stats['misses']
+        hit_rate = (stats['hits'] + stats['stale']) / lookups * 100 if lookups else 0
+
+        embed = discord.Embed(title='📦 API Cache',
+                              description=f"**{len(cache)}/{cache.max_entries}** responses cached, **{hit_rate:.1f}%** hit rate.",
+                              colour=ctx.author.colour,
+                              timestamp=ctx.message.created_at)
+        for name, value in stats.items():
+            embed.add_field(name=name.title(), value=f"{value:,d}", inline=True)
+
+        prefetch = self.client.prefetch.stats
+        embed.add_field(name='Prefetch Pools',
+                        value=f"**{prefetch['buffered']}** buffered across **{len(self.client.prefetch.pools)}** endpoints\n"
+                              f"**{prefetch.get('served', 0):,d}** served from memory, **{prefetch.get('live', 0):,d}** live, "
+                              f"**{prefetch.get('fetched', 0):,d}** prefetched, **{prefetch.get('errors', 0):,d}** errors, "
+                              f"**{prefetch.get('deferred', 0):,d}** refills deferred after errors",
+                        inline=False)
+        await ctx.send(embed=embed)
+
+    @commands.command(aliases=['render_stats'], hidden=True)
+    @commands.is_owner()
+    @commands.cooldown(1, 5, commands.BucketType.user)
+    async def renderstats(self, ctx):
+        """Image render pool, avatar cache and render cache statistics"""
+
+        render = self.client.render
+        stats = render.stats
+        average_queue = stats['queue_time'] / stats['jobs'] if stats['jobs'] else 0
+        average_process = stats['process_time'] / stats['jobs'] if stats['jobs'] else 0
+
+        embed = discord.Embed(title='🖼️ Render Pool',
+                              description=f"**{render.workers}** {render.mode} worker(s), **{render.pending}/{render.max_queue}** jobs in flight, **{render.timeout}s** timeout.",
+                              colour=ctx.author.colour,
+                              timestamp=ctx.message.created_at)
+        fields = [('Jobs', f"{stats['jobs']:,d}", True),
+                  ('Rejected', f"{stats['rejected']:,d}", True),
+                  ('Timeouts', f"{stats['timeouts']:,d}", True),
+                  ('Errors', f"{stats['errors']:,d}", True),
+                  ('Queue Time', f"avg **{average_queue:.3f}ms** / max **{stats['max_queue_time']:.3f}ms**", False),
+                  ('Processing Time', f"avg **{average_process:.3f}ms** / max **{stats['max_process_time']:.3f}ms**", False)]
+
+        avatars = self.client.avatars
+        fields.append(('Avatar Cache', f"**{len(avatars)}** avatars, **{avatars.bytes / 1024:,.1f}/{avatars.max_bytes / 1024:,.0f} KiB**\n"
+                                       + ', '.join(f"{name} **{value:,d}**" for name, value in avatars.stats.items()), False))
+
+        renders = self.client.renders
+        fields.append(('Render Cache', f"**{len(renders)}** renders, **{renders.bytes / 1024:,.1f}/{renders.max_bytes / 1024:,.0f} KiB** in memory, **{renders.spill_bytes / 1024:,.1f} KiB** on disk\n"
+                                       + ', '.join(f"{name} **{value:,d}**" for name, value in renders.stats.items()), False))
+
+        images = self.client.get_cog('Images')
+        if images and images.stats:
+            lines = [f"`{command}` **{stats['renders']:,d}** renders, saved **{(stats['baseline'] - stats['bytes']) / 1024:,.1f} KiB** "
+                     f"({1 - stats['bytes'] / stats['baseline']:.0%})"
+                     for command, stats in sorted(images.stats.items())]
+            fields.append((f"Encoding (budget {self.client.image_encoding.budget / 1024:,.0f} KiB)", '\n'.join(lines), False))
+        for name, value, inline in fields:
+            embed.add_field(name=name, value=value, inline=inline)
+        await ctx.send(embed=embed)
+
+    @commands.command(aliases=['health'], hidden=True)
+    @commands.is_owner()
+    @commands.cooldown(1, 5, commands.BucketType.user)
+    async def metrics(self, ctx):
+        """Sampled process and gateway metrics over the last minute, 15 minutes and hour"""
+
+        metrics = self.client.metrics
+        embed = discord.Embed(title='📈 Metrics',
+                              description=f"**{len(metrics.samples)}/{metrics.samples.size}** samples, one every **{metrics.interval}s**. Values are min / avg / max.",
+                              colour=ctx.author.colour,
+                              timestamp=ctx.message.created_at)
+
+        for label, seconds in (('1m', 60), ('15m', 900), ('1h', 3600)):
+            window = metrics.samples.window(seconds)
+            if not window:
+                embed.add_field(name=label, value='No samples yet', inline=False)
+                continue
+
+            lines = [f"{name}: {' / '.join(format(value, fmt) for value in window[field])}{unit}"
+                     for field, name, fmt, unit in (('cpu', 'CPU', '.1f', '%'),
+                                                    ('rss', 'Memory', ',.1f', ' MiB'),
+                                                    ('lag', 'Loop Lag', '.3f', 'ms'),
+                                                    ('latency', 'Latency', '.1f', 'ms'),
+                                                    ('guilds', 'Servers', ',.0f', ''),
+                                                    ('users', 'Users', ',.0f', ''),
+                                                    ('commands', 'Commands', '.1f', '/min'))]
+            embed.add_field(name=label, value='\n'.join(lines), inline=True)
+        await ctx.send(embed=embed)
+
+    @commands.command(aliases=['blocking', 'lag'], hidden=True)
+    @commands.is_owner()
+    @commands.cooldown(1, 5, commands.BucketType.user)
+    async def stalls(self, ctx):
+        """Event loop stalls caught by the watchdog, by culprit, with the latest stack"""
+
+        watchdog = self.client.watchdog
+        stats = watchdog.stats
+        embed = discord.Embed(title='🐢 Loop Stalls',
+                              description=f"Callbacks holding the loop over **{watchdog.threshold * 1000:.0f}ms**. Current lag **{watchdog.lag * 1000:.1f}ms**.",
+                              colour=ctx.author.colour,
+                              timestamp=ctx.message.created_at)
+        fields = [('Stalls', f"{stats['stalls']:,d}", True),
+                  ('Time Stalled', f"{stats['stalled_ms']:,.0f}ms", True),
+                  ('Longest', f"{stats['max_stall_ms']:,.0f}ms", True)]
+        if watchdog.culprits:
+            fields.append(('Culprits', '\n'.join(f"`{culprit}` **{count:,d}**" for culprit, count in watchdog.culprits.most_common(10)), False))
+        if watchdog.history:
+            last = watchdog.history[-1]
+            fields.append((f"Latest: {last.culprit} ({last.duration:,.0f}ms)", f"```\n{last.stack[-1000:]}\n```", False))
+        for name, value, inline in fields:
+            embed.add_field(name=name, value=value, inline=inline)
+        await ctx.send(embed=embed)
+
+    @commands.command(aliases=['command_stats', 'timings'], hidden=True)
+    @commands.is_owner()
+    @commands.cooldown(1, 5, commands.BucketType.user)
+    async def cmdstats(self, ctx, *, command: Optional[str]=None):
+        """Per-command call counts, errors and latency, slowest first"""
+
+        instruments = self.client.instruments
+        if command:
+            found = self.client.get_command(command)
+            stats = instruments.commands.get(found.qualified_name) if found else None
+            commands = [(found.qualified_name, stats)] if stats else []
+        else:
+            commands = sorted(instruments.commands.items(), key=lambda item: item[1].latency['total'].sum, reverse=True)[:10]
+
+        embed = discord.Embed(title='⏱️ Command Timings',
+                              description='Latency is avg / p50 / p95 in ms, percentiles are histogram bucket bounds.' if commands else 'No invocations recorded yet.',
+                              colour=ctx.author.colour,
+                              timestamp=ctx.message.created_at)
+        for name, stats in commands:
+            lines = [f"**{stats.calls:,d}** calls, **{stats.errors:,d}** errors"]
+            for phase, histogram in stats.latency.items():
+                if histogram.count:
+                    lines.append(f"{phase}: {histogram.sum / histogram.count:,.1f} / {histogram.quantile(0.5):,.0f} / {histogram.quantile(0.95):,.0f}")
+            embed.add_field(name=f"`{name}`", value='\n'.join(lines), inline=True)
+        await ctx.send(embed=embed)
+
     @commands.command(hidden=True)
     @commands.cooldown(2, 5, commands.BucketType.user)
     async def help(self, ctx, *cog):
         """Displays this message"""
 
+        index = self.client.help_index
+        prefix = await self.client.prefix(ctx.message)
+
         if not cog:
-            embed = discord.Embed(title='🔧 Module List',
-                                  description=f"Do `{await self.client.prefix(ctx.message)}help [module]` for more info on a specific module.",
-                                  colour=ctx.author.colour,
+            embed = index.module_list.copy()
+            embed.description = f"Do `{prefix}help [module]` for more info on a specific module."
+
+        elif len(cog) > 1:
+            embed = discord.Embed(title='⛔ Error!',
+                                  description='That is way too many cogs!',
+                                  colour=self.client.colours['RED'],
                                   timestamp=ctx.message.created_at)
 
-            cog_list = []
-            for x in self.client.cogs:
-                if x.lower() in ('errors', 'events'):
-                    pass
-                else:
-                    cog_list.append((x, self.client.cogs[x].__doc__, False))
-            for name, value, inline in cog_list:
-                embed.add_field(name=name, value=value, inline=inline)
-            embed.set_author(name=f"{ctx.author.name}#{ctx.author.discriminator}",
-                             icon_url=ctx.author.avatar_url)
-            embed.set_thumbnail(url=self.client.user.avatar_url)
-            await ctx.send(embed=embed)
+        elif (page := index.modules.get(cog[0].lower())):
+            embed = page.copy()
+            embed.description += f"\nDo `{prefix}help [command]` for more info on a command"
+            await ctx.message.add_reaction(emoji='👍')
+
+        elif (page := index.commands.get(cog[0].lower())):
+            embed = page.copy()
+
         else:
-            if len(cog) > 1:
-                embed = discord.Embed(title='⛔ Error!',
-                                      description='That is way too many cogs!',
-                                      colour=self.client.colours['RED'],
-                                      timestamp=ctx.message.created_at)
-                embed.set_author(name=f"{ctx.author.name}#{ctx.author.discriminator}",
-                                 icon_url=ctx.author.avatar_url)
-                embed.set_thumbnail(url=self.client.user.avatar_url)
-                await ctx.send(embed=embed)
-            else:
-                found = False
-                for x in self.client.cogs:
-                    for y in cog:
-                        if x.lower() == y.lower():
-                            embed = discord.Embed(title=f"🚧 {str(x).title()} Command List",
-                                                  description=f"**{str(x).title()} - {self.client.cogs[x].__doc__}**\nDo `{await self.client.prefix(ctx.message)}help [command]` for more info on a command",
-                                                  colour=ctx.author.colour,
-                                                  timestamp=ctx.message.created_at)
-
-                            command_list = []
-                            for c in self.client.get_cog(y.capitalize()).get_commands():
-                                if not c.hidden:
-                                    if c.signature:
-                                        command_list.append((f"`{c.qualified_name} {c.signature}`", f"{c.help}", False))
-                                    else:
-                                        command_list.append((f"`{c.qualified_name}`", f"{c.help}", False))
-                            for name, value, inline in command_list:
-                                embed.add_field(name=name, value=value, inline=inline)
-                            embed.set_author(name=f"{ctx.author.name}#{ctx.author.discriminator}",
-                                             icon_url=ctx.author.avatar_url)
-                            embed.set_thumbnail(url=self.client.user.avatar_url)
-                            found = True
-                if not found:
-                    for x in self.client.cogs:
-                        for c in self.client.get_cog(x).get_commands():
-                            if c.name == cog[0].lower():
-                                embed = discord.Embed(title='🔧 Command Syntax',
-                                                      description='GuhBot\'s commands and how to use them.',
-                                                      colour=ctx.author.colour,
-                                                      timestamp=ctx.message.created_at)
-                                embed.add_field(name=f"{c.name} - {c.help}",
-                                                value=f"Proper Syntax:\n`{c.qualified_name} {c.signature}`",
-                                                inline=False)
-                                if c.aliases == [] or c.aliases == [None]:
-                                    c.aliases.clear()
-                                    c.aliases.append('No Aliases')
-                                embed.add_field(name='Command Aliases',
-                                                value=', '.join(c.aliases),
-                                                inline=False)
-                                embed.set_author(name=f"{ctx.author.name}#{ctx.author.discriminator}",
-                                                 icon_url=ctx.author.avatar_url)
-                                embed.set_thumbnail(url=self.client.user.avatar_url)
-                        found = True
-                else:
-                    await ctx.message.add_reaction(emoji='👍')
-                try:
-                    await ctx.send(embed=embed)
-                except UnboundLocalError:
-                    embed = discord.Embed(title='⛔ Error!',
-                                          description=f"How would you even use the command or module \"**{cog[0]}**\"?\nSorry, but I don\'t see a command or module called \"**{cog[0]}**\"",
-                                          colour=self.client.colours['RED'],
-                                          timestamp=ctx.message.created_at)
-                    await ctx.send(embed=embed)
+            embed = discord.Embed(title='⛔ Error!',
+                                  description=f"How would you even use the command or module \"**{cog[0]}**\"?\nSorry, but I don\'t see a command or module called \"**{cog[0]}**\"",
+                                  colour=self.client.colours['RED'],
+                                  timestamp=ctx.message.created_at)
+            if (suggestions := index.suggest(cog[0])):
+                embed.add_field(name='Did you mean...', value=', '.join(f"`{name}`" for name in suggestions))
+            await ctx.send(embed=embed)
+            return
+
+        if embed.colour == discord.Embed.Empty:
+            embed.colour = ctx.author.colour
+            embed.timestamp = ctx.message.created_at
+        embed.set_author(name=f"{ctx.author.name}#{ctx.author.discriminator}",
+                         icon_url=ctx.author.avatar_url)
+        embed.set_thumbnail(url=self.client.user.avatar_url)
+        await ctx.send(embed=embed)
 
     @commands.command(aliases=['change_prefix'])
     @commands.cooldown(1, 10, commands.BucketType.guild)
@@ -187,22 +317,13 @@ class Meta(commands.Cog):
             await ctx.send(embed=embed)
 
         else:
-            cur = await self.client.db.cursor()
-            await cur.execute('SELECT prefix FROM prefixes WHERE id = ?', (ctx.guild.id,))
-            prefix = await cur.fetchone()
-
-            if not prefix:
-                if not new_prefix == 'guh ':
-                    await cur.execute('INSERT INTO prefixes (id, prefix) VALUES (?, ?)', (ctx.guild.id, new_prefix))
-
+            # The cache is updated immediately, the row is written behind
+            if new_prefix == self.client.default_prefix:
+                self.client.prefixes.pop(ctx.guild.id, None)
+                self.client.writes.write('prefixes', ctx.guild.id, 'DELETE FROM prefixes WHERE id = ?', (ctx.guild.id,))
             else:
-                if new_prefix =='guh ':
-                    await cur.execute('DELETE FROM prefixes WHERE id = ?', (ctx.guild.id,))
-                else:  
-                    await cur.execute('UPDATE prefixes SET prefix = ? WHERE id = ?', (new_prefix, ctx.guild.id))
-            
-            await cur.close()
-            await self.client.db.commit()
+                self.client.prefixes[ctx.guild.id] = new_prefix
+                self.client.writes.write('prefixes', ctx.guild.id, 'INSERT OR REPLACE INTO prefixes (id, prefix) VALUES (?, ?)', (ctx.guild.id, new_prefix))
 
             await ctx.send(f"Set the custom prefix to `{new_prefix}`\nDo `{new_prefix}prefix` to set it back to the default prefix.\nPing {self.client.user.mention} to check the current prefix.")
 
@@ -221,18 +342,18 @@ class Meta(commands.Cog):
         botUsername = self.client.user.name
         websocketLatency = round(self.client.latency * 1000, 3)
         serverCount = len(self.client.guilds)
-        memberCount = len(set(self.client.get_all_members()))
+        memberCount = len(self.client.users_tally)
         botVersion = self.client.version
         pythonVer = python_version()
         dpyVer = discord.__version__
-        proc = Process()
-        with proc.oneshot():
-            uptime = timedelta(seconds=time()-proc.create_time())
-            cpu_time = timedelta(seconds=(proc.cpu_times()).system + proc.cpu_times().user)
-            cpu_usage = f"**{cpu_percent()}%**"
-            mem_total = virtual_memory().total / (1024**2)
-            mem_of_total = proc.memory_percent()
-            mem_usage = mem_total * (mem_of_total / 100)
+        metrics = self.client.metrics
+        snapshot = await metrics.latest()
+        uptime = timedelta(seconds=time()-metrics.started)
+        cpu_time = timedelta(seconds=snapshot['cpu_time'])
+        cpu_usage = f"**{snapshot['cpu']:.1f}%**"
+        mem_total = metrics.memory_total / (1024**2)
+        mem_usage = snapshot['rss']
+        mem_of_total = mem_usage / mem_total * 100
 
         ping_title = choice(['🏓 Pong', '🏓 Ping'])
         content = ''
@@ -262,6 +383,7 @@ class Meta(commands.Cog):
                   ('💾 CPU Time', strfdelta(cpu_time, "{days} day(s)\n{hours} hour(s)\n{minutes} minute(s)\n{seconds} second(s)"), True),
                   ('⚙️ CPU Usage', cpu_usage, True),
                   ('💽 Memory Usage', f"{mem_usage:,.3f} / {mem_total:,.0f} MiB ({mem_of_total:.0f}%)", True),
+                  ('🐢 Loop Stalls', f"**{self.client.watchdog.stats['stalls']:,d}** stall(s), longest **{self.client.watchdog.stats['max_stall_ms']:,.0f}ms**", True),
                   ('🙋 Support Server', f"[Support Server]({self.client.support_url})", True),
                   ('🤖 Bot Invite', f"[{self.client.user.name} Invite]({self.client.invite_url})", True),
                   (f"🔗 {self.client.user.name} Website", f"[{self.client.user.name} Website]({self.client.official_url})", True),
@@ -372,6 +494,7 @@ class Meta(commands.Cog):
         """Cog loader"""
 
         self.client.load_extension(f"lib.cogs.{cog}")
+        self.client.help_index.build()
         await ctx.send(f"`{cog} loaded successfully.`")
 
     @commands.command(hidden=True)
@@ -380,6 +503,7 @@ class Meta(commands.Cog):
         """Cog unloader"""
 
         self.client.unload_extension(f"lib.cogs.{cog}")
+        self.client.help_index.build()
         await ctx.send(f"`{cog} unloaded successfully.`")
 
     @commands.command(hidden=True)
@@ -389,8 +513,73 @@ class Meta(commands.Cog):
 
         self.client.unload_extension(f"lib.cogs.{cog}")
         self.client.load_extension(f"lib.cogs.{cog}")
+        self.client.help_index.build()
         await ctx.send(f"`{cog} reloaded successfully.`")
 
+    @commands.command(hidden=True)
+    @commands.is_owner()
+    async def cprofile(self, ctx, command, invocations: Optional[int]=10):
+        """Profile the next invocations of a command, `stop` cancels an armed profile"""
+
+        if command == 'stop':
+            name = self.client.profiler.disarm()
+            await ctx.send(f"`Stopped profiling {name}.`" if name else '`No command profile is armed.`')
+            return
+
+        found = self.client.get_command(command)
+        if not found:
+            await ctx.send(f"`No command called {command}.`")
+        elif self.client.profiler.busy:
+            await ctx.send('`A profile is already running.`')
+        else:
+            self.client.profiler.arm(found.qualified_name, max(invocations, 1), ctx.channel)
+            await ctx.send(f"`Profiling the next {max(invocations, 1)} invocation(s) of {found.qualified_name}.`")
+
+    @commands.command(hidden=True)
+    @commands.is_owner()
+    async def profileloop(self, ctx, seconds: Optional[float]=10):
+        """Profile everything the event loop runs for a few seconds"""
+
+        if self.client.profiler.busy:
+            await ctx.send('`A profile is already running.`')
+            return
+
+        await ctx.send(f"`Profiling the event loop for {seconds:g}s.`")
+        file, summary = await self.client.profiler.profile_loop(min(seconds, 300))
+        await ctx.send(f"Event loop profile written to `{file}`\n```\n{summary}\n```")
+
+    @commands.command(hidden=True)
+    @commands.is_owner()
+    async def record(self, ctx, action: Optional[str]=None):
+        """Record anonymized gateway events for replay, `stop` finishes the recording"""
+
+        recorder = self.client.recorder
+        if action == 'stop':
+            if not recorder.recording:
+                await ctx.send('`Not recording.`')
+                return
+            file, events = await recorder.stop()
+            await ctx.send(f"`Recorded {events:,d} event(s) to {file}`")
+
+        elif recorder.recording:
+            await ctx.send(f"`Recording to {recorder.file}, {recorder.events:,d} event(s) so far.`")
+
+        else:
+            await ctx.send(f"`Recording gateway events to {recorder.start()}`")
+
+    @commands.command(aliases=['tracemalloc'], hidden=True)
+    @commands.is_owner()
+    async def memsnapshot(self, ctx, action: Optional[str]=None):
+        """Take a tracemalloc snapshot and diff it against the last one, `stop` ends tracing"""
+
+        if action == 'stop':
+            self.client.profiler.stop_tracing()
+            await ctx.send('`Stopped tracing memory allocations.`')
+            return
+
+        file, summary = await self.client.profiler.snapshot()
+        await ctx.send(f"Memory snapshot written to `{file}`\n```\n{summary}\n```")
+
     @commands.Cog.listener()
     async def on_ready(self):
         if not self.client.ready:
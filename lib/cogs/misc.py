@@ -4,84 +4,117 @@ from asyncio import sleep
 from aiosqlite import connect
 from discord.ext import commands
 from typing import Union, Optional
+from apscheduler.triggers.interval import IntervalTrigger
 
 # Builtin modules
 from os import getcwd
 from json import load, dump
-from aiohttp import request
 from datetime import datetime
 
 
+COVID_URL = 'https://api.covid19api.com/summary'
+COVID_FIELDS = ('NewConfirmed', 'TotalConfirmed', 'NewDeaths', 'TotalDeaths', 'NewRecovered', 'TotalRecovered')
+# alias: ISO code (or 'global') it points at
+COVID_ALIASES = {'world': 'global',
+                 'earth': 'global',
+                 'usa': 'us',
+                 'america': 'us',
+                 'united states': 'us',
+                 'uk': 'gb',
+                 'britain': 'gb',
+                 'great britain': 'gb',
+                 'england': 'gb',
+                 'south korea': 'kr',
+                 'korea': 'kr',
+                 'north korea': 'kp',
+                 'russia': 'ru',
+                 'uae': 'ae',
+                 'czechia': 'cz',
+                 'vietnam': 'vn',
+                 'iran': 'ir',
+                 'syria': 'sy',
+                 'taiwan': 'tw'}
+
+def covid_key(name):
+    """Case and separator insensitive lookup key"""
+
+    return ' '.join(name.casefold().replace('-', ' ').replace('_', ' ').split())
+
+def covid_index(data):
+    """Index a /summary payload by country name, slug, ISO code and alias"""
+
+    index = {'global': dict(data['Global'], Country='Global')}
+    for country in data['Countries']:
+        for name in (country['Country'], country['Slug'], country['CountryCode']):
+            index[covid_key(name)] = country
+
+    for alias, target in COVID_ALIASES.items():
+        if target in index:
+            index.setdefault(alias, index[target])
+
+    return index
+
+
 class Misc(commands.Cog):
     """Miscellaneous Commands"""
 
     def __init__(self, client):
         self.client = client
+        self.covid_data = None
+        self.covid_updated = None
+
+        client.scheduler.add_job(self.refresh_covid, IntervalTrigger(minutes=15), next_run_time=datetime.now(),
+                                 misfire_grace_time=None)  # The scheduler only starts in on_ready
+
+    async def refresh_covid(self):
+        """Fetch the COVID-19 summary and rebuild the country index"""
+
+        status, data = await self.client.api_cache.get_json(COVID_URL, refresh=True)
+        if status == 200:
+            self.covid_data = covid_index(data)
+            self.covid_updated = datetime.utcnow()
+        return status
 
     @commands.command(aliases=['corona', 'coronavirus', 'covid19', 'covid-19'])
     @commands.cooldown(1, 8, commands.BucketType.user)
-    async def covid(self, ctx, *, country: str = None):
+    async def covid(self, ctx, *, country: str = 'Global'):
         """COVID-19 summary and stats"""
 
-        api_url = 'https://api.covid19api.com/summary'
-
-        await ctx.trigger_typing()
-
-        async with request('GET', api_url, headers={}) as response:
-
-            if not country:
-                country = 'Global'
-                if response.status == 200:
-                    data = await response.json()
-                    newConfirmed = f"{data[country]['NewConfirmed']:,d}"
-                    totalConfirmed = f"{data[country]['TotalConfirmed']:,d}"
-                    newDeaths = f"{data[country]['NewDeaths']:,d}"
-                    totalDeaths = f"{data[country]['TotalDeaths']:,d}"
-                    newRecovered = f"{data[country]['NewRecovered']:,d}"
-                    totalRecovered = f"{data[country]['TotalRecovered']:,d}"
-
-                else:
-                    await ctx.send(f"API returned a `{response.status} status.` Try again.")
-
-            else:
-                country = country.title()
-                if response.status == 200:
-                    data = await response.json()
-                    for element in data['Countries']:
-                        if element['Country'] == country:
-                            newConfirmed = f"{element['NewConfirmed']:,d}"
-                            totalConfirmed = f"{element['TotalConfirmed']:,d}"
-                            newDeaths = f"{element['NewDeaths']:,d}"
-                            totalDeaths = f"{element['TotalDeaths']:,d}"
-                            newRecovered = f"{element['NewRecovered']:,d}"
-                            totalRecovered = f"{element['TotalRecovered']:,d}"
-
-                else:
-                    await ctx.send(f"API returned a `{response.status} status.` Try again.")
-
-            embed = discord.Embed(title=f"{country} COVID-19 Stats",
-                                  url='https://covid19api.com/',
-                                  description='Get current [COVID-19 statistics](https://covid19api.com/). Data updated multiple times a day.',
-                                  colour=ctx.author.colour,
-                                  timestamp=ctx.message.created_at)
-            try:
-                fields = [('New Confirmed Cases', newConfirmed, True),
-                          ('Total Confirmed Cases', totalConfirmed, True),
-                          ('New Deaths', newDeaths, False),
-                          ('Total Deaths', totalDeaths, True),
-                          ('New Recoveries', newRecovered, True),
-                          ('Total Recoveries', totalRecovered, False),
-                          ('Help Stop COVID-19', '[Advice to the Public](https://www.who.int/emergencies/diseases/novel-coronavirus-2019/advice-for-public)', True)]
-                for name, value, inline in fields:
-                    embed.add_field(name=name, value=value, inline=inline)
-                embed.set_thumbnail(
-                    url='https://cdn.discordapp.com/attachments/239446877953720321/691020838379716698/unknown.png')
-                embed.set_author(name=f"{ctx.author.name}#{ctx.author.discriminator}",
-                                 icon_url=ctx.author.avatar_url)
-                await ctx.send(embed=embed)
-            except UnboundLocalError:
-                await ctx.send(f"Sorry {ctx.author.mention}, I couldn\'t find COVID-19 stats for `{country}`")
-        
+        if not self.covid_data: # Only ever wait on the API before the first snapshot
+            await ctx.trigger_typing()
+            status = await self.refresh_covid()
+            if not self.covid_data:
+                await ctx.send(f"API returned a `{status} status.` Try again.")
+                return
+
+        stats = self.covid_data.get(covid_key(country))
+        if not stats:
+            await ctx.send(f"Sorry {ctx.author.mention}, I couldn\'t find COVID-19 stats for `{country}`")
+            return
+
+        newConfirmed, totalConfirmed, newDeaths, totalDeaths, newRecovered, totalRecovered = (f"{stats[field]:,d}" for field in COVID_FIELDS)
+
+        embed = discord.Embed(title=f"{stats['Country']} COVID-19 Stats",
+                              url='https://covid19api.com/',
+                              description='Get current [COVID-19 statistics](https://covid19api.com/). Data updated multiple times a day.',
+                              colour=ctx.author.colour,
+                              timestamp=ctx.message.created_at)
+        fields = [('New Confirmed Cases', newConfirmed, True),
+                  ('Total Confirmed Cases', totalConfirmed, True),
+                  ('New Deaths', newDeaths, False),
+                  ('Total Deaths', totalDeaths, True),
+                  ('New Recoveries', newRecovered, True),
+                  ('Total Recoveries', totalRecovered, False),
+                  ('Help Stop COVID-19', '[Advice to the Public](https://www.who.int/emergencies/diseases/novel-coronavirus-2019/advice-for-public)', True)]
+        for name, value, inline in fields:
+            embed.add_field(name=name, value=value, inline=inline)
+        embed.set_thumbnail(
+            url='https://cdn.discordapp.com/attachments/239446877953720321/691020838379716698/unknown.png')
+        embed.set_author(name=f"{ctx.author.name}#{ctx.author.discriminator}",
+                         icon_url=ctx.author.avatar_url)
+        embed.set_footer(text=f"Snapshot from {self.covid_updated.strftime('%b %d, %Y, %I:%M %p')} UTC")
+        await ctx.send(embed=embed)
+
     @commands.command(aliases=['server_stats', 'server'], hidden=True)
     @commands.cooldown(1, 8, commands.BucketType.user)
     async def server_info(self, ctx):
@@ -231,16 +264,9 @@ class Misc(commands.Cog):
                              icon_url=ctx.author.avatar_url)
 
         else:
-            cur = await self.client.db.cursor()
-            # Select row with author id
-            await cur.execute('SELECT * FROM afk WHERE id = ?', (ctx.author.id,))
-            author_afk = await cur.fetchone()
-
-            if not author_afk:  # Check if row doesn't exist
-                # Insert into row
-                await cur.execute('INSERT INTO afk (id, reason) VALUES (?, ?)', (ctx.author.id, reason))
-
-            await self.client.db.commit()
+            if ctx.author.id not in self.client.afk:  # Check if user isn't already AFK
+                self.client.writes.write('afk', ctx.author.id, 'INSERT OR REPLACE INTO afk (id, mentions, reason) VALUES (?, 0, ?)', (ctx.author.id, reason))
+                self.client.afk[ctx.author.id] = {'mentions': 0, 'reason': reason}
 
             embed = discord.Embed(title=f"🟡 Now AFK",
                                   description=f"{ctx.author.mention} is now **AFK** for: **{reason}**",
@@ -258,10 +284,13 @@ class Misc(commands.Cog):
     async def snipe(self, ctx):
         """Snipe the most recently deleted message"""
 
-        cur = await self.client.db.cursor()
-        await cur.execute('SELECT * FROM snipe WHERE channel_id = ?', (ctx.channel.id,))
-        snipe = await cur.fetchone()
-        await cur.close()
+        with self.client.instruments.timed('db'):
+            await self.client.writes.flush() # Make queued deletions visible
+
+            cur = await self.client.db.cursor()
+            await cur.execute('SELECT * FROM snipe WHERE channel_id = ?', (ctx.channel.id,))
+            snipe = await cur.fetchone()
+            await cur.close()
 
         if not snipe:
             await ctx.send('There\'s nothing to snipe!')
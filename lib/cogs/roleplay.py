@@ -6,7 +6,9 @@ from akinator.async_aki import Akinator
 
 # Builtin modules
 import random
-from aiohttp import request
+
+GIF_URL = 'https://some-random-api.ml/animu/{}'
+GIFS = ('wink', 'pat', 'hug', 'face-palm')
 
 class Roleplay(commands.Cog):
     """Roleplay Commands!!!"""
@@ -14,6 +16,9 @@ class Roleplay(commands.Cog):
     def __init__(self, client):
         self.client = client
 
+        # Random gifs, so replies can come straight from a prefetched buffer
+        client.prefetch.register(*(GIF_URL.format(gif) for gif in GIFS))
+
     @commands.command()
     @commands.cooldown(1, 5, commands.BucketType.user)
     async def dab(self, ctx, member : discord.Member = None):
@@ -47,25 +52,22 @@ class Roleplay(commands.Cog):
         if not member:
             member =  self.client.user
 
-        api_url = "https://some-random-api.ml/animu/wink"
-
-        await ctx.trigger_typing()
+        status, data = await self.client.prefetch.get_json(GIF_URL.format('wink'))
 
-        async with request('GET', api_url, headers={}) as response:
-            if response.status == 200:
-                data = await response.json()
-                img = data["link"]
+        if status == 200:
+            img = data["link"]
 
-            else:
-                await ctx.send(f"API returned a `{response.status} status.` Try again.")
+        else:
+            await ctx.send(f"API returned a `{status} status.` Try again.")
+            return
 
-            embed = discord.Embed(description=f"*{ctx.author.mention} winks at {member.mention} {reason}*",
-                                  colour=ctx.author.colour,
-                                  timestamp=ctx.message.created_at)
-            embed.set_author(name=f"{ctx.author.name}#{ctx.author.discriminator}",
-                             icon_url=ctx.author.avatar_url)
-            embed.set_image(url=img)
-            await ctx.send(embed=embed)
+        embed = discord.Embed(description=f"*{ctx.author.mention} winks at {member.mention} {reason}*",
+                              colour=ctx.author.colour,
+                              timestamp=ctx.message.created_at)
+        embed.set_author(name=f"{ctx.author.name}#{ctx.author.discriminator}",
+                         icon_url=ctx.author.avatar_url)
+        embed.set_image(url=img)
+        await ctx.send(embed=embed)
 
     @commands.command()
     @commands.cooldown(1, 5, commands.BucketType.user)
@@ -75,25 +77,22 @@ class Roleplay(commands.Cog):
         if not member:
             member = self.client.user
 
-        api_url = "https://some-random-api.ml/animu/pat"
-
-        await ctx.trigger_typing()
+        status, data = await self.client.prefetch.get_json(GIF_URL.format('pat'))
 
-        async with request('GET', api_url, headers={}) as response:
-            if response.status == 200:
-                data = await response.json()
-                img = data["link"]
+        if status == 200:
+            img = data["link"]
 
-            else:
-                await ctx.send(f"API returned a `{response.status} status.` Try again.")
+        else:
+            await ctx.send(f"API returned a `{status} status.` Try again.")
+            return
 
-            embed = discord.Embed(description=f"*{ctx.author.mention} pats {member.mention} {reason}*",
-                                  colour=ctx.author.colour,
-                                  timestamp=ctx.message.created_at)
-            embed.set_author(name=f"{ctx.author.name}#{ctx.author.discriminator}",
-                             icon_url=ctx.author.avatar_url)
-            embed.set_image(url=img)
-            await ctx.send(embed=embed)
+        embed = discord.Embed(description=f"*{ctx.author.mention} pats {member.mention} {reason}*",
+                              colour=ctx.author.colour,
+                              timestamp=ctx.message.created_at)
+        embed.set_author(name=f"{ctx.author.name}#{ctx.author.discriminator}",
+                         icon_url=ctx.author.avatar_url)
+        embed.set_image(url=img)
+        await ctx.send(embed=embed)
 
     @commands.command()
     @commands.cooldown(1, 5, commands.BucketType.user)
@@ -103,50 +102,44 @@ class Roleplay(commands.Cog):
         if not member:
             member = self.client.user
 
-        api_url = "https://some-random-api.ml/animu/hug"
-
-        await ctx.trigger_typing()
+        status, data = await self.client.prefetch.get_json(GIF_URL.format('hug'))
 
-        async with request('GET', api_url, headers={}) as response:
-            if response.status == 200:
-                data = await response.json()
-                img = data["link"]
+        if status == 200:
+            img = data["link"]
 
-            else:
-                await ctx.send(f"API returned a `{response.status} status.` Try again.")
+        else:
+            await ctx.send(f"API returned a `{status} status.` Try again.")
+            return
 
-            embed = discord.Embed(description=f"*{ctx.author.mention} hugs {member.mention} {reason}*",
-                                  colour=ctx.author.colour,
-                                  timestamp=ctx.message.created_at)
-            embed.set_author(name=f"{ctx.author.name}#{ctx.author.discriminator}",
-                             icon_url=ctx.author.avatar_url)
-            embed.set_image(url=img)
-            await ctx.send(embed=embed)
+        embed = discord.Embed(description=f"*{ctx.author.mention} hugs {member.mention} {reason}*",
+                              colour=ctx.author.colour,
+                              timestamp=ctx.message.created_at)
+        embed.set_author(name=f"{ctx.author.name}#{ctx.author.discriminator}",
+                         icon_url=ctx.author.avatar_url)
+        embed.set_image(url=img)
+        await ctx.send(embed=embed)
 
     @commands.command(aliases=['face_palm', 'facepalms'])
     @commands.cooldown(1, 5, commands.BucketType.user)
     async def facepalm(self, ctx, *, reason=' '):
         """For those frustrating moments"""
 
-        api_url = "https://some-random-api.ml/animu/face-palm"
+        status, data = await self.client.prefetch.get_json(GIF_URL.format('face-palm'))
 
-        await ctx.trigger_typing()
+        if status == 200:
+            img = data["link"]
 
-        async with request('GET', api_url, headers={}) as response:
-            if response.status == 200:
-                data = await response.json()
-                img = data["link"]
+        else:
+            await ctx.send(f"API returned a `{status} status.` Try again.")
+            return
 
-            else:
-                await ctx.send(f"API returned a `{response.status} status.` Try again.")
-
-            embed = discord.Embed(description=f"{ctx.author.mention} facepalms {reason}",
-                                  colour=ctx.author.colour,
-                                  timestamp=ctx.message.created_at)
-            embed.set_author(name=f"{ctx.author.name}#{ctx.author.discriminator}",
-                             icon_url=ctx.author.avatar_url)
-            embed.set_image(url=img)
-            await ctx.send(embed=embed)
+        embed = discord.Embed(description=f"{ctx.author.mention} facepalms {reason}",
+                              colour=ctx.author.colour,
+                              timestamp=ctx.message.created_at)
+        embed.set_author(name=f"{ctx.author.name}#{ctx.author.discriminator}",
+                         icon_url=ctx.author.avatar_url)
+        embed.set_image(url=img)
+        await ctx.send(embed=embed)
 
     @commands.command(hidden=True)
     @commands.cooldown(1, 5, commands.BucketType.user)
@@ -0,0 +1 @@
+"""Pure image functions, safe to run in worker processes (no discord or bot imports)"""
@@ -0,0 +1,51 @@
+# 3rd party modules
+from PIL import ImageSequence, GifImagePlugin
+
+# Builtin modules
+from time import monotonic
+
+MAX_FRAMES = 60
+MAX_PIXELS = 16_000_000  # Output pixels across every frame
+MAX_SECONDS = 5  # Below the render pool timeout so a shortened animation still arrives
+
+
+def render(source, transform, buffer, colors=256, max_frames=MAX_FRAMES, max_pixels=MAX_PIXELS, max_seconds=MAX_SECONDS):
+    """Stream an animated image through transform into a GIF, one frame at a time
+
+    Each frame is decoded, transformed, quantized and written before the next one is
+    read, so only a single source and output frame are alive at once. Frames past the
+    frame, pixel or time limits are dropped, giving a shortened animation.
+    Returns the number of frames written.
+    """
+
+    started = monotonic()
+    pixels = 0
+    written = 0
+
+    for index, frame in enumerate(ImageSequence.Iterator(source)):
+        if index >= max_frames or monotonic() - started > max_seconds:
+            break
+
+        duration = frame.info.get('duration', 100)
+        out = transform(frame.convert('RGBA'))
+
+        pixels += out.width * out.height
+        if written and pixels > max_pixels:
+            break
+
+        out = out.convert('RGB').quantize(colors=colors)
+        params = {'duration': duration, 'include_color_table': True}
+
+        if not written:
+            # Older Pillow writes the loop extension with the first frame, newer with the header
+            params['loop'] = source.info.get('loop', 0)
+            header, _ = GifImagePlugin.getheader(out, info={'loop': params['loop']})
+            for chunk in header:
+                buffer.write(chunk)
+
+        for chunk in GifImagePlugin.getdata(out, **params):
+            buffer.write(chunk)
+        written += 1
+
+    buffer.write(b';')  # GIF trailer
+    return written
@@ -0,0 +1,67 @@
+# Local modules
+from .ops import OPERATIONS
+
+MAX_LENGTH = 8
+MAX_ANGLE = 360
+MIN_SIZE = 16
+MAX_SIZE = 512
+
+
+class ChainError(ValueError):
+    """An operation chain that can't be rendered"""
+
+
+def _int(name, value, low, high):
+    try:
+        number = int(value)
+    except ValueError:
+        raise ChainError(f"`{name}` needs a whole number, not `{value}`") from None
+
+    if not low <= number <= high:
+        raise ChainError(f"`{name}` must be between {low} and {high}")
+    return number
+
+def parse(text, templates, max_length=MAX_LENGTH):
+    """Operation chain for ops.render from text like ``rotate:90 grayscale overlay:trash``
+
+    Arguments follow a colon and are separated by commas. Returns a tuple of tuples so
+    chains can be used as cache keys.
+    """
+
+    steps = text.split()
+    if not steps:
+        raise ChainError('no operations were given')
+    if len(steps) > max_length:
+        raise ChainError(f"chains are limited to {max_length} operations")
+
+    chain = []
+    for step in steps:
+        name, _, arguments = step.lower().partition(':')
+        arguments = [argument for argument in arguments.split(',') if argument]
+
+        if name not in OPERATIONS:
+            raise ChainError(f"unknown operation `{name}`, try {', '.join(f'`{op}`' for op in OPERATIONS)}")
+
+        if name == 'rotate':
+            if len(arguments) != 1:
+                raise ChainError('use `rotate:<angle>`')
+            chain.append(('rotate', _int('rotate', arguments[0], -MAX_ANGLE, MAX_ANGLE)))
+
+        elif name == 'resize':
+            if len(arguments) not in (1, 2):
+                raise ChainError('use `resize:<size>` or `resize:<width>,<height>`')
+            # A single size makes a square
+            width, height = (_int('resize', argument, MIN_SIZE, MAX_SIZE) for argument in (arguments * 2)[:2])
+            chain.append(('resize', width, height))
+
+        elif name == 'overlay':
+            if len(arguments) != 1 or arguments[0] not in templates:
+                raise ChainError(f"use `overlay:<template>` with one of {', '.join(f'`{name}`' for name in templates)}")
+            chain.append(('overlay', templates[arguments[0]]))
+
+        else:
+            if arguments:
+                raise ChainError(f"`{name}` takes no arguments")
+            chain.append((name,))
+
+    return tuple(chain)
@@ -0,0 +1,76 @@
+# 3rd party modules
+from PIL import Image
+
+# Builtin modules
+from collections import namedtuple
+
+# budget: bytes an upload should stay under, formats: still image formats allowed
+Encoding = namedtuple('Encoding', ('budget', 'formats'))
+DEFAULT = Encoding(budget=96 * 1024, formats=('png', 'webp'))
+
+WEBP_QUALITIES = (90, 75, 60, 45)
+GIF_COLORS = 64  # Palette size for the second attempt at an animation over budget
+FASTOCTREE = Image.Quantize.FASTOCTREE if hasattr(Image, 'Quantize') else Image.FASTOCTREE
+
+
+def _save(img, buffer, format, **params):
+    buffer.seek(0)
+    buffer.truncate()
+    img.save(buffer, format, **params)
+    return buffer.getvalue()
+
+def _quick(img, buffer, formats):
+    if 'webp' in formats:
+        # Low effort lossless WebP costs about as much as the baseline PNG and is usually far smaller
+        yield lambda: _save(img, buffer, 'WEBP', lossless=True, method=2, quality=0)
+
+def _lossless(img, buffer, formats):
+    if 'png' in formats:
+        yield lambda: _save(img, buffer, 'PNG', optimize=True)
+    if 'webp' in formats:
+        yield lambda: _save(img, buffer, 'WEBP', lossless=True, method=4)
+
+def _lossy(img, buffer, formats):
+    if 'png' in formats:
+        rgba = img if img.mode == 'RGBA' else img.convert('RGBA')
+        yield lambda: _save(rgba.quantize(colors=256, method=FASTOCTREE), buffer, 'PNG', optimize=True)
+    if 'webp' in formats:
+        for quality in WEBP_QUALITIES:
+            yield lambda quality=quality: _save(img, buffer, 'WEBP', quality=quality, method=4)
+
+def encode(img, buffer, encoding=DEFAULT):
+    """(bytes, baseline bytes) for a still image
+
+    The baseline is a plain PNG, what the bot always used to upload. One quick lossless
+    candidate is always tried, the slower lossless ones only while the result is over
+    the byte budget, and lossy ones only while it is still over after those.
+    """
+
+    baseline = _save(img, buffer, 'PNG')
+    best = baseline
+
+    for stage in (_quick, _lossless, _lossy):
+        if stage is not _quick and len(best) <= encoding.budget:
+            break
+
+        for candidate in stage(img, buffer, encoding.formats):
+            try:
+                data = candidate()
+            except (OSError, KeyError, ValueError):
+                continue  # Format not supported by this Pillow build
+
+            if len(data) < len(best):
+                best = data
+            if stage is _lossy and len(best) <= encoding.budget:
+                break
+
+    return best, len(baseline)
+
+def extension(data):
+    """File extension for encoded bytes"""
+
+    if data[:3] == b'GIF':
+        return 'gif'
+    if data[:4] == b'RIFF' and data[8:12] == b'WEBP':
+        return 'webp'
+    return 'png'
@@ -0,0 +1,120 @@
+# 3rd party modules
+from PIL import Image, ImageOps
+
+# Builtin modules
+from io import BytesIO
+from threading import Lock, local
+from collections import OrderedDict, namedtuple
+
+# Local modules
+from . import animation, encoding, templates
+
+# One output buffer per worker thread, reused for every encode
+_buffers = local()
+
+# Avatar bytes plus the cache key they were stored under (None when uncached)
+# and whether they hold an animated GIF
+Avatar = namedtuple('Avatar', ('key', 'data', 'animated'))
+
+# Decoded avatars kept per process, so repeat renders also skip the decode
+DECODED_AVATARS = 32
+_decoded = OrderedDict()  # key: Image
+_decoded_lock = Lock()  # Render threads share it when processes are disabled
+
+
+def output_buffer():
+    """This thread's reusable output buffer, emptied"""
+
+    buffer = getattr(_buffers, 'buffer', None)
+    if buffer is None:
+        buffer = _buffers.buffer = BytesIO()
+
+    buffer.seek(0)
+    buffer.truncate()
+    return buffer
+
+def open_avatar(avatar):
+    """Private decoded copy of an Avatar"""
+
+    if avatar.key is None:
+        return Image.open(BytesIO(avatar.data))
+
+    with _decoded_lock:
+        img = _decoded.get(avatar.key)
+        if img is not None:
+            _decoded.move_to_end(avatar.key)
+
+    if img is None:
+        # Decoded outside the lock, another thread may race us to the same avatar
+        img = Image.open(BytesIO(avatar.data))
+        img.load()
+        with _decoded_lock:
+            _decoded[avatar.key] = img
+            _decoded.move_to_end(avatar.key)
+            while len(_decoded) > DECODED_AVATARS:
+                _decoded.popitem(last=False)
+
+    return img.copy()
+
+def rotate(img, angle):
+    """Rotate counter clockwise by angle degrees"""
+
+    return img.rotate(angle)
+
+def grayscale(img):
+    """Black and white"""
+
+    return ImageOps.grayscale(img)
+
+def flip(img):
+    """Upside down"""
+
+    return ImageOps.flip(img)
+
+def mirror(img):
+    """Left to right"""
+
+    return ImageOps.mirror(img)
+
+def resize(img, width, height):
+    return img.resize((width, height))
+
+def overlay(img, template):
+    """Resize and paste onto a template"""
+
+    bg = templates.background(template)
+    bg.paste(img.resize(template.size), template.position)
+    return bg
+
+OPERATIONS = {'rotate': rotate,
+              'grayscale': grayscale,
+              'flip': flip,
+              'mirror': mirror,
+              'resize': resize,
+              'overlay': overlay}
+
+def apply(img, chain):
+    for name, *args in chain:
+        img = OPERATIONS[name](img, *args)
+    return img
+
+def render(avatar, chain, settings=encoding.DEFAULT):
+    """(bytes, baseline bytes) for an avatar after each (operation, *args) in chain
+
+    Still avatars are decoded once, transformed and encoded once through the encoding
+    optimizer. Animated avatars are streamed frame by frame into a GIF, with a second
+    smaller-palette pass if the first one is over the byte budget.
+    """
+
+    if avatar.animated:
+        def stream(colors):
+            buffer = output_buffer()
+            animation.render(Image.open(BytesIO(avatar.data)), lambda frame: apply(frame, chain), buffer, colors=colors)
+            return buffer.getvalue()
+
+        data = baseline = stream(256)
+        if len(data) > settings.budget:
+            data = min(data, stream(encoding.GIF_COLORS), key=len)
+        return data, len(baseline)
+
+    return encoding.encode(apply(open_avatar(avatar), chain), output_buffer(), settings)
@@ -0,0 +1,105 @@
+# Builtin modules
+from time import time
+from multiprocessing import get_context
+from asyncio import wait_for, wrap_future, TimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+
+class RenderBusy(Exception):
+    """Too many render jobs are already queued"""
+
+class RenderTimeout(Exception):
+    """A render job ran past its timeout"""
+
+
+def _timed(func, args):
+    """Run a job inside the worker, reporting when it started and finished"""
+
+    started = time()
+    result = func(*args)
+    return started, time(), result
+
+
+class RenderPool(object):
+    """Runs pure image functions off the event loop
+
+    Jobs go to a process pool so they scale across cores, or to a thread pool when
+    processes are disabled or unavailable. Functions and arguments must be picklable.
+    """
+
+    def __init__(self, workers=2, max_queue=32, timeout=15, processes=True):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.pending = 0
+
+        self.stats = {'jobs': 0,
+                      'rejected': 0,
+                      'timeouts': 0,
+                      'errors': 0,
+                      'queue_time': 0.0,
+                      'max_queue_time': 0.0,
+                      'process_time': 0.0,
+                      'max_process_time': 0.0}
+
+        self.executor = self._create(processes)
+
+    def _create(self, processes):
+        if processes:
+            try:
+                # spawn keeps the bot's threads and sockets out of the workers
+                return ProcessPoolExecutor(max_workers=self.workers, mp_context=get_context('spawn'))
+            except (ImportError, NotImplementedError, OSError) as error:
+                print(f"Process pool unavailable ({error}), rendering on threads")
+
+        return ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='render')
+
+    @property
+    def mode(self):
+        return 'process' if isinstance(self.executor, ProcessPoolExecutor) else 'thread'
+
+    async def run(self, func, *args):
+        """Result of func(*args) computed in the pool"""
+
+        if self.pending >= self.max_queue:
+            self.stats['rejected'] += 1
+            raise RenderBusy(f"{self.pending} render jobs are already queued")
+
+        self.pending += 1
+        submitted = time()
+        try:
+            future = self.executor.submit(_timed, func, args)
+            started, finished, result = await wait_for(wrap_future(future), self.timeout)
+
+        except TimeoutError:
+            # A job that already started keeps its worker until it finishes
+            self.stats['timeouts'] += 1
+            raise RenderTimeout(f"Render took longer than {self.timeout} seconds") from None
+
+        except BrokenProcessPool:
+            # A worker died (most likely killed for memory), start a fresh pool
+            self.stats['errors'] += 1
+            self.executor = self._create(self.mode == 'process')
+            raise
+
+        except Exception:
+            self.stats['errors'] += 1
+            raise
+
+        finally:
+            self.pending -= 1
+
+        queue_time = max(started - submitted, 0) * 1000
+        process_time = (finished - started) * 1000
+
+        self.stats['jobs'] += 1
+        self.stats['queue_time'] += queue_time
+        self.stats['max_queue_time'] = max(self.stats['max_queue_time'], queue_time)
+        self.stats['process_time'] += process_time
+        self.stats['max_process_time'] = max(self.stats['max_process_time'], process_time)
+
+        return result
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False)
@@ -0,0 +1,67 @@
+# 3rd party modules
+from PIL import Image
+
+# Builtin modules
+from os import stat
+from threading import Lock
+from json import load
+from pathlib import Path
+from collections import namedtuple
+
+# version is the file's mtime so edited templates are decoded again
+Template = namedtuple('Template', ('name', 'path', 'size', 'position', 'content', 'version'))
+
+# (path, version): decoded image, one per process
+_decoded = {}
+_decoded_lock = Lock()  # Render threads share it when processes are disabled
+
+
+def load_registry(path):
+    """Templates declared in a JSON file, keyed by name
+
+    Each entry names an image next to the JSON file, the size the avatar is resized
+    to, where it is pasted and optional message content.
+    """
+
+    folder = Path(path).parent
+    with open(path, 'r', encoding='utf-8') as registry:
+        specs = load(registry)
+
+    templates = {}
+    for name, spec in specs.items():
+        file = str(folder / spec['file'])
+        templates[name] = Template(name=name,
+                                   path=file,
+                                   size=tuple(spec['size']),
+                                   position=tuple(spec['position']),
+                                   content=spec.get('content'),
+                                   version=stat(file).st_mtime_ns)
+    return templates
+
+def decode(template):
+    """Decoded template image, shared, never modify it"""
+
+    key = (template.path, template.version)
+    with _decoded_lock:
+        img = _decoded.get(key)
+        if img is None:
+            # Drop older versions of the same file
+            for stale in [k for k in _decoded if k[0] == template.path]:
+                del _decoded[stale]
+
+            img = Image.open(template.path)
+            img.load()
+            _decoded[key] = img
+
+    return img
+
+def background(template):
+    """Private copy of a template to paste onto"""
+
+    return decode(template).copy()
+
+def warm(templates):
+    """Decode every template now instead of on first use"""
+
+    for template in templates:
+        decode(template)
@@ -0,0 +1,46 @@
+# 3rd party modules
+from PIL import Image
+
+# Builtin modules
+from io import BytesIO
+from pathlib import Path
+from asyncio import run, gather
+
+# Local modules
+from lib.imaging import ops, templates
+from lib.imaging.pool import RenderPool
+
+TEMPLATES = Path(__file__).resolve().parents[1] / 'lib' / 'images' / 'templates.json'
+COLORS = [(255, 0, 0), (0, 255, 0), (0, 0, 255), (255, 255, 0),
+          (255, 0, 255), (0, 255, 255), (255, 255, 255), (0, 0, 0)]
+
+
+def avatar(color):
+    buffer = BytesIO()
+    Image.new('RGB', (128, 128), color).save(buffer, 'PNG')
+    return ops.Avatar(None, buffer.getvalue(), False)
+
+def closest(pixel):
+    return min(COLORS, key=lambda color: sum((a - b) ** 2 for a, b in zip(color, pixel)))
+
+def test_concurrent_overlays_keep_their_own_avatar():
+    """Renders in flight together in the process pool never mix up their avatars"""
+
+    template = templates.load_registry(TEMPLATES)['trash']
+    center = (template.position[0] + template.size[0] // 2, template.position[1] + template.size[1] // 2)
+
+    async def render_all():
+        pool = RenderPool(workers=2, max_queue=len(COLORS), timeout=60, processes=True)
+        try:
+            results = await gather(*(pool.run(ops.render, avatar(color), (('overlay', template),)) for color in COLORS))
+        finally:
+            pool.shutdown()
+        return pool, results
+
+    pool, results = run(render_all())
+
+    assert pool.mode == 'process'
+    assert pool.stats['jobs'] == len(COLORS) and pool.stats['errors'] == 0
+    for color, (data, _) in zip(COLORS, results):
+        pixel = Image.open(BytesIO(data)).convert('RGB').getpixel(center)
+        assert closest(pixel) == color